@@ -1,7 +1,5 @@
 #!/usr/bin/env python3
 
-import sys
-import time
 from thsr_py.cli import parse_args
 from thsr_py.flows import run, show_station, show_time_table
 
@@ -17,44 +15,14 @@ def _preload_ocr_if_needed(args) -> None:
         not args.task_status and 
         not args.cancel_task):
         
-        start_time = time.time()
-        
         try:
-            # Import and initialize OCR to warm up the model
-            import os
-            from pathlib import Path
-            
-            # Set TensorFlow to be quiet
-            os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
-            
-            # Try to load model path
-            if getattr(sys, 'frozen', False):
-                # Running in PyInstaller bundle
-                bundle_dir = Path(sys._MEIPASS)
-                model_path = str(bundle_dir / "thsr_ocr" / "thsr_prediction_model_250827.keras")
-            else:
-                # Running in development
-                model_path = str(Path(__file__).parent / "thsr_ocr" / "thsr_prediction_model_250827.keras")
-            
-            if os.path.exists(model_path):
-                # Add OCR path to sys.path
-                if getattr(sys, 'frozen', False):
-                    sys.path.append(str(bundle_dir / "thsr_ocr"))
-                else:
-                    sys.path.append(str(Path(__file__).parent / "thsr_ocr"))
-                
-                from test_model import CaptchaModelTester
-                
-                # Initialize model (this takes the most time)
-                tester = CaptchaModelTester(model_path)
-                
-                # print(f"OCR Model Loaded")
-            else:
-                print("OCR Model Not Found, Falling Back to Manual Input")
-
+            # Load the shared OCR model instance that the booking flow reuses
+            from thsr_py.flows import _get_ocr_model
+            _get_ocr_model()
         except Exception as e:
             print(f"OCR Preload Failed: {e}")
 
+
 def main() -> None:
     args = parse_args()
     
@@ -85,15 +53,13 @@ def main() -> None:
         return
 
     if args.task_status:
-        from thsr_py.api_client import THSRApiClient, show_task_status
-        client = THSRApiClient()
-        show_task_status(client, args.task_status)
+        from thsr_py.api_client import get_default_client, show_task_status
+        show_task_status(get_default_client(), args.task_status)
         return
 
     if args.cancel_task:
-        from thsr_py.api_client import THSRApiClient, cancel_task_interactive
-        client = THSRApiClient()
-        cancel_task_interactive(client, args.cancel_task)
+        from thsr_py.api_client import get_default_client, cancel_task_interactive
+        cancel_task_interactive(get_default_client(), args.cancel_task)
         return
 
     # Scheduled booking mode (via API)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+THSR Captcha ONNX Model
+- Export the Keras prediction model to ONNX and quantize it to int8
+- Run the quantized model with onnxruntime (no TensorFlow needed at runtime)
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+# Characters sorted alphabetically as in training script
+CHARACTERS = ['2', '3', '4', '5', '6', '7', '8', '9',
+              'C', 'D', 'F', 'G', 'H', 'K', 'M', 'N', 'P', 'R', 'T', 'V', 'W', 'Y', 'Z']
+
+
+class OnnxCaptchaModelTester:
+    def __init__(self, model_path="thsr_prediction_model.int8.onnx"):
+        """
+        Load a quantized captcha model for CPU inference
+
+        Args:
+            model_path: Path to the exported ONNX model
+        """
+        import onnxruntime as ort
+
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file not found: {model_path}")
+
+        self.model_path = model_path
+        self.img_width = 160
+        self.img_height = 50
+        self.max_length = 4  # Assuming 4-character captchas
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        # Index 0 is the StringLookup OOV token, the last class is the CTC blank
+        self.num_to_char = ["[UNK]"] + CHARACTERS
+
+    def preprocess_array(self, image_array):
+        """
+        Convert an in-memory image into the model input layout
+
+        Args:
+            image_array: uint8 array of shape (H, W), (H, W, 1) or (H, W, 3)
+
+        Returns:
+            float32 array of shape (1, width, height, 1)
+        """
+        img = np.asarray(image_array)
+        if img.ndim == 3:
+            if img.shape[-1] == 3:
+                img = img @ np.array([0.2989, 0.5870, 0.1140])
+            else:
+                img = img[..., 0]
+
+        if img.shape != (self.img_height, self.img_width):
+            from PIL import Image
+            img = np.asarray(
+                Image.fromarray(img.astype(np.uint8)).resize((self.img_width, self.img_height), Image.BILINEAR)
+            )
+
+        img = img.astype(np.float32) / 255.0
+        # Width becomes the time dimension
+        return img.T[np.newaxis, :, :, np.newaxis]
+
+    def decode_batch_predictions(self, pred):
+        """Greedy CTC decoding of model outputs to text"""
+        blank = pred.shape[-1] - 1
+        output_text = []
+        for best_path in pred.argmax(axis=-1):
+            chars = []
+            previous = None
+            for index in best_path:
+                if index != previous and index != blank:
+                    chars.append(self.num_to_char[index] if index < len(self.num_to_char) else "[UNK]")
+                previous = index
+            output_text.append("".join(chars[:self.max_length]))
+        return output_text
+
+    def predict_array(self, image_array):
+        """Predict text from an in-memory image"""
+        return self.predict_batch([image_array])[0]
+
+    def predict_batch(self, image_arrays):
+        """Predict text for several in-memory images with one session run"""
+        batch = np.concatenate([self.preprocess_array(arr) for arr in image_arrays], axis=0)
+        pred = self.session.run(None, {self.input_name: batch})[0]
+        return self.decode_batch_predictions(pred)
+
+
+def export_model(keras_model_path, onnx_model_path, quantize=True):
+    """
+    Export the Keras prediction model to ONNX, optionally quantized to int8
+
+    Requires tensorflow, tf2onnx and onnxruntime.
+    """
+    import tensorflow as tf
+    import tf2onnx
+    from test_model import CaptchaModelTester
+
+    tester = CaptchaModelTester(keras_model_path)
+    model = tester.prediction_model
+    spec = (tf.TensorSpec((None, tester.img_width, tester.img_height, 1), tf.float32, name="image"),)
+
+    float_path = onnx_model_path
+    if quantize:
+        float_path = str(Path(onnx_model_path).with_suffix("")) + ".fp32.onnx"
+
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=17, output_path=float_path)
+    print(f"ONNX model saved to: {float_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(float_path, onnx_model_path, weight_type=QuantType.QInt8)
+        os.remove(float_path)
+        print(f"Quantized model saved to: {onnx_model_path}")
+
+    return onnx_model_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export THSR Captcha OCR Model to ONNX")
+    parser.add_argument("--model", "-m", default="thsr_prediction_model_250827.keras",
+                       help="Path to trained Keras model (default: thsr_prediction_model_250827.keras)")
+    parser.add_argument("--output", "-o", default="thsr_prediction_model_250827.int8.onnx",
+                       help="Output ONNX path (default: thsr_prediction_model_250827.int8.onnx)")
+    parser.add_argument("--no-quantize", action="store_true",
+                       help="Keep float32 weights instead of quantizing to int8")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"Input model not found: {args.model}")
+        exit(1)
+
+    export_model(args.model, args.output, quantize=not args.no_quantize)
@@ -238,11 +238,34 @@ class CaptchaModelTester:
         img = tf.io.read_file(image_path)
         img = tf.io.decode_jpeg(img, channels=1)  # Grayscale JPEG
         
+        return self._prepare_tensor(img)
+    
+    def preprocess_array(self, image_array):
+        """
+        Preprocess an in-memory image for model prediction
+        
+        Args:
+            image_array: uint8 array of shape (H, W), (H, W, 1) or (H, W, 3)
+            
+        Returns:
+            Preprocessed image tensor
+        """
+        img = tf.convert_to_tensor(image_array, dtype=tf.uint8)
+        if img.shape.rank == 2:
+            img = tf.expand_dims(img, axis=-1)
+        elif img.shape[-1] == 3:
+            img = tf.image.rgb_to_grayscale(img)
+        
+        return self._prepare_tensor(img)
+    
+    def _prepare_tensor(self, img):
+        """Convert a decoded grayscale uint8 image into the model input tensor"""
         # Convert to float32 in [0, 1] range
         img = tf.image.convert_image_dtype(img, tf.float32)
         
-        # Resize to model input size
-        img = tf.image.resize(img, [self.img_height, self.img_width])
+        # Resize to model input size (processed captchas already match it)
+        if tuple(img.shape[:2]) != (self.img_height, self.img_width):
+            img = tf.image.resize(img, [self.img_height, self.img_width])
         
         # Transpose for time dimension (width becomes time)
         img = tf.transpose(img, perm=[1, 0, 2])
@@ -311,6 +334,34 @@ class CaptchaModelTester:
         
         return pred_text
     
+    def predict_array(self, image_array):
+        """
+        Predict text from an in-memory image (no temporary files)
+        
+        Args:
+            image_array: uint8 array, e.g. np.asarray(pil_image)
+            
+        Returns:
+            Predicted text string
+        """
+        img_tensor = self.preprocess_array(image_array)
+        pred = self.prediction_model.predict(img_tensor, verbose=0)
+        return self.decode_batch_predictions(pred)[0]
+    
+    def predict_batch(self, image_arrays):
+        """
+        Predict text for several in-memory images with one model call
+        
+        Args:
+            image_arrays: Sequence of uint8 arrays of the same size
+            
+        Returns:
+            List of predicted text strings, in input order
+        """
+        batch = tf.concat([self.preprocess_array(arr) for arr in image_arrays], axis=0)
+        pred = self.prediction_model.predict(batch, verbose=0)
+        return self.decode_batch_predictions(pred)
+    
     def download_and_test(self, count=5, processing_mode='balanced', show_images=True):
         """
         Download captcha images, process them, and test model predictions
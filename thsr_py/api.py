@@ -1,28 +1,84 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import re
 import requests
+import uuid
 from datetime import datetime
+from itertools import islice
 from typing import Dict, List, Optional
 
-from fastapi import FastAPI, HTTPException, Query, Depends, Header
+from fastapi import FastAPI, HTTPException, Query, Depends, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, validator, model_validator
+from pydantic import BaseModel, Field, TypeAdapter, validator, model_validator
 import uvicorn
 
 from .scheduler import (
     BookingTask, BookingStatus, 
-    get_scheduler, create_booking_task
+    get_scheduler, create_booking_task, _quiet_booking_run
 )
-from .schema import STATION_MAP, TIME_TABLE
+from .schema import STATION_MAP, TIME_TABLE, format_time_slot
 from .flows import run as run_booking_flow
 
 # Utility function to clean ANSI color codes
+_ANSI_RE = re.compile(r'\033\[[0-9;]*m')
+
+
 def clean_ansi_codes(text: Optional[str]) -> Optional[str]:
     """Remove ANSI color codes from text."""
     if not text:
         return text
-    import re
-    return re.sub(r'\033\[[0-9;]*m', '', text).strip()
+    if '\033' not in text:
+        return text.strip()
+    return _ANSI_RE.sub('', text).strip()
+
+
+# Conditional GET helpers
+def _static_etag(value) -> str:
+    """Build a weak ETag from the content of a constant table."""
+    return f'W/"{hashlib.sha1(repr(value).encode()).hexdigest()[:16]}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the client's If-None-Match header covers the given ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+def _not_modified(etag: str) -> Response:
+    """Build an empty 304 response carrying the current ETag."""
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+# scheduler.revision restarts at 0 in every process, so revision-based ETags also
+# carry this per-process ID; a tag cached before a restart can then never match
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+# Stations and time slots never change at runtime, so their ETags are fixed at startup
+_STATIONS_ETAG = _static_etag(STATION_MAP)
+_TIME_SLOTS_ETAG = _static_etag(TIME_TABLE)
+
+
+def _encode_static_payload(data) -> bytes:
+    """Serialize a constant response body the same way JSONResponse would."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# Pre-serialized bodies for the constant /stations and /times endpoints
+_STATIONS_PAYLOAD = _encode_static_payload([
+    {"id": idx + 1, "name": name}
+    for idx, name in enumerate(STATION_MAP)
+])
+_TIME_SLOTS_PAYLOAD = _encode_static_payload([
+    {"id": idx + 1, "time": time_str, "formatted_time": format_time_slot(time_str)}
+    for idx, time_str in enumerate(TIME_TABLE)
+])
+
 
 # Authentication dependency
 async def get_current_user(authorization: str = Header(None), x_internal_cli: str = Header(None)) -> Optional[str]:
@@ -56,6 +112,11 @@ async def get_current_user(authorization: str = Header(None), x_internal_cli: st
     return None
 
 
+# Precompiled validation patterns for booking requests
+_DATE_RE = re.compile(r"^(\d{4})/(\d{1,2})/(\d{1,2})$")
+_PID_RE = re.compile(r"^[A-Z0-9]{10}$")
+
+
 # Pydantic models for API request/response
 class BookingRequest(BaseModel):
     from_station: int = Field(..., ge=1, le=12, description="Departure station ID (1-12)")
@@ -76,13 +137,19 @@ class BookingRequest(BaseModel):
     
     @validator('date')
     def validate_date(cls, v):
+        # Each failure raises its final message directly; only datetime's own
+        # range error needs wrapping
+        match = _DATE_RE.match(v)
+        if not match:
+            raise ValueError(f"Invalid date format or past date: time data '{v}' does not match format 'YYYY/MM/DD'")
+        year, month, day = map(int, match.groups())
         try:
-            booking_date = datetime.strptime(v, "%Y/%m/%d")
-            if booking_date.date() < datetime.now().date():
-                raise ValueError("Booking date must be in the future")
-            return v
+            booking_date = datetime(year, month, day).date()
         except ValueError as e:
             raise ValueError(f"Invalid date format or past date: {e}")
+        if booking_date < datetime.now().date():
+            raise ValueError("Invalid date format or past date: Booking date must be in the future")
+        return v
     
     @validator('personal_id')
     def validate_personal_id(cls, v):
@@ -91,6 +158,8 @@ class BookingRequest(BaseModel):
         v = v.strip().upper()
         if len(v) != 10:
             raise ValueError("Personal ID must be 10 characters long")
+        if not _PID_RE.match(v):
+            raise ValueError("Personal ID may only contain letters and digits")
         return v
     
     @model_validator(mode='after')
@@ -146,6 +215,37 @@ class TaskStatusResponse(BaseModel):
     created_at: str
 
 
+class ScheduleResponse(BookingResponse):
+    task: Optional[TaskStatusResponse] = None
+
+
+_TASK_LIST_ADAPTER = TypeAdapter(List[TaskStatusResponse])
+
+
+def _task_status_row(task: BookingTask) -> Dict:
+    """Build the TaskStatusResponse fields for a task."""
+    return {
+        "id": task.id,
+        "status": task.status.value,
+        "from_station": task.from_station,
+        "to_station": task.to_station,
+        "date": task.date,
+        "adult_cnt": task.adult_cnt,
+        "student_cnt": task.student_cnt,
+        "child_cnt": task.child_cnt,
+        "senior_cnt": task.senior_cnt,
+        "disabled_cnt": task.disabled_cnt,
+        "time": task.time,
+        "train_index": task.train_index,
+        "interval_minutes": task.interval_minutes,
+        "attempts": task.attempts,
+        "last_attempt": task.last_attempt.isoformat() if task.last_attempt else None,
+        "success_pnr": clean_ansi_codes(task.success_pnr),
+        "error_message": task.error_message,
+        "created_at": task.created_at.isoformat()
+    }
+
+
 class StationInfo(BaseModel):
     id: int
     name: str
@@ -200,34 +300,19 @@ async def root():
 
 
 @app.get("/stations", response_model=List[StationInfo])
-async def get_stations():
+async def get_stations(request: Request):
     """Get all available stations."""
-    return [
-        StationInfo(id=idx + 1, name=name) 
-        for idx, name in enumerate(STATION_MAP)
-    ]
+    if _etag_matches(request, _STATIONS_ETAG):
+        return _not_modified(_STATIONS_ETAG)
+    return Response(_STATIONS_PAYLOAD, media_type="application/json", headers={"ETag": _STATIONS_ETAG})
 
 
 @app.get("/times", response_model=List[TimeSlotInfo])
-async def get_time_slots():
+async def get_time_slots(request: Request):
     """Get all available departure time slots."""
-    time_slots = []
-    for idx, time_str in enumerate(TIME_TABLE):
-        t_int = int(time_str[:-1])
-        if time_str.endswith("A") and t_int // 100 == 12:
-            t_int %= 1200
-        elif t_int != 1230 and time_str.endswith("P"):
-            t_int += 1200
-        formatted_time = f"{t_int:04d}"
-        formatted = f"{formatted_time[:-2]}:{formatted_time[-2:]}"
-        
-        time_slots.append(TimeSlotInfo(
-            id=idx + 1,
-            time=time_str,
-            formatted_time=formatted
-        ))
-    
-    return time_slots
+    if _etag_matches(request, _TIME_SLOTS_ETAG):
+        return _not_modified(_TIME_SLOTS_ETAG)
+    return Response(_TIME_SLOTS_PAYLOAD, media_type="application/json", headers={"ETag": _TIME_SLOTS_ETAG})
 
 
 @app.post("/book", response_model=BookingResponse)
@@ -257,41 +342,26 @@ async def immediate_booking(request: BookingRequest):
         )
         
         # Execute booking flow
-        import io
-        import sys
         import os
-        from contextlib import redirect_stdout, redirect_stderr
         
         # Set environment variable to indicate API mode (non-interactive)
         original_api_mode = os.environ.get('THSR_API_MODE')
         os.environ['THSR_API_MODE'] = '1'
         
-        stdout_buffer = io.StringIO()
-        stderr_buffer = io.StringIO()
-        
         try:
-            with redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
-                run_booking_flow(args)
-            
-            output = stdout_buffer.getvalue()
+            # The flow reports its outcome in the result, so its console output
+            # is dropped rather than buffered; other threads keep their output
+            with _quiet_booking_run():
+                result = run_booking_flow(args)
             
-            if "PNR Code:" in output:
-                # Extract PNR code
-                lines = output.split('\n')
-                pnr_code = None
-                for line in lines:
-                    if "PNR Code:" in line:
-                        pnr_code = line.split("PNR Code:")[-1].strip()
-                        break
-                
+            if result.success:
                 return BookingResponse(
                     success=True,
                     message="Booking completed successfully!",
-                    pnr_code=pnr_code
+                    pnr_code=result.pnr
                 )
             else:
-                error_output = stderr_buffer.getvalue()
-                error_msg = error_output if error_output else "Booking failed - no PNR code found"
+                error_msg = result.error or "Booking failed - no PNR code found"
                 
                 return BookingResponse(
                     success=False,
@@ -314,7 +384,7 @@ async def immediate_booking(request: BookingRequest):
         raise HTTPException(status_code=400, detail=f"Invalid request: {str(e)}")
 
 
-@app.post("/schedule", response_model=BookingResponse)
+@app.post("/schedule", response_model=ScheduleResponse)
 async def schedule_booking(
     request: ScheduledBookingRequest,
     current_user_id: Optional[str] = Depends(get_current_user)
@@ -351,10 +421,11 @@ async def schedule_booking(
         scheduler = get_scheduler()
         task_id = scheduler.add_task(task)
         
-        return BookingResponse(
+        return ScheduleResponse(
             success=True,
             message=f"Booking scheduled successfully! Task will run every {request.interval_minutes} minutes.",
-            task_id=task_id
+            task_id=task_id,
+            task=TaskStatusResponse(**_task_status_row(task))
         )
     
     except Exception as e:
@@ -362,7 +433,10 @@ async def schedule_booking(
 
 
 @app.get("/tasks", response_model=List[TaskStatusResponse])
-async def list_tasks(current_user_id: Optional[str] = Depends(get_current_user)):
+async def list_tasks(
+    request: Request,
+    current_user_id: Optional[str] = Depends(get_current_user)
+):
     """List scheduled booking tasks for the authenticated user."""
     # Require authentication for task access
     if not current_user_id:
@@ -371,33 +445,22 @@ async def list_tasks(current_user_id: Optional[str] = Depends(get_current_user))
     scheduler = get_scheduler()
     tasks = scheduler.list_tasks(force_reload=False)
     
+    # The task list differs per user, so the user is part of the ETag
+    etag = f'W/"{_BOOT_ID}-{scheduler.revision}-{current_user_id}"'
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+    
     # CLI internal access sees all tasks, regular users see only their own
     if current_user_id != "cli-internal":
         tasks = [task for task in tasks if task.user_id == current_user_id]
     
-    return [
-        TaskStatusResponse(
-            id=task.id,
-            status=task.status.value,
-            from_station=task.from_station,
-            to_station=task.to_station,
-            date=task.date,
-            adult_cnt=task.adult_cnt,
-            student_cnt=task.student_cnt,
-            child_cnt=task.child_cnt,
-            senior_cnt=task.senior_cnt,
-            disabled_cnt=task.disabled_cnt,
-            time=task.time,
-            train_index=task.train_index,
-            interval_minutes=task.interval_minutes,
-            attempts=task.attempts,
-            last_attempt=task.last_attempt.isoformat() if task.last_attempt else None,
-            success_pnr=clean_ansi_codes(task.success_pnr),
-            error_message=task.error_message,
-            created_at=task.created_at.isoformat()
-        )
-        for task in tasks
-    ]
+    # Validate and serialize the whole list in one pydantic-core pass
+    rows = _TASK_LIST_ADAPTER.validate_python([_task_status_row(task) for task in tasks])
+    return Response(
+        _TASK_LIST_ADAPTER.dump_json(rows),
+        media_type="application/json",
+        headers={"ETag": etag}
+    )
 
 
 @app.get("/tasks/{task_id}", response_model=TaskStatusResponse)
@@ -420,26 +483,7 @@ async def get_task_status(
     if current_user_id != "cli-internal" and task.user_id != current_user_id:
         raise HTTPException(status_code=403, detail="Access denied: You can only view your own tasks")
     
-    return TaskStatusResponse(
-        id=task.id,
-        status=task.status.value,
-        from_station=task.from_station,
-        to_station=task.to_station,
-        date=task.date,
-        adult_cnt=task.adult_cnt,
-        student_cnt=task.student_cnt,
-        child_cnt=task.child_cnt,
-        senior_cnt=task.senior_cnt,
-        disabled_cnt=task.disabled_cnt,
-        time=task.time,
-        train_index=task.train_index,
-        interval_minutes=task.interval_minutes,
-        attempts=task.attempts,
-        last_attempt=task.last_attempt.isoformat() if task.last_attempt else None,
-        success_pnr=clean_ansi_codes(task.success_pnr),
-        error_message=task.error_message,
-        created_at=task.created_at.isoformat()
-    )
+    return TaskStatusResponse(**_task_status_row(task))
 
 
 @app.delete("/tasks/{task_id}", response_model=BookingResponse)
@@ -505,11 +549,16 @@ async def remove_task(
 
 
 @app.get("/scheduler/status")
-async def get_scheduler_status():
+async def get_scheduler_status(request: Request, response: Response):
     """Get scheduler status information."""
     scheduler = get_scheduler()
     tasks = scheduler.list_tasks(force_reload=False)
     
+    etag = f'W/"{_BOOT_ID}-{scheduler.revision}"'
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+    
     status_counts = {}
     for status in BookingStatus:
         status_counts[status.value] = sum(1 for task in tasks if task.status == status)
@@ -645,21 +694,17 @@ async def get_results(
             raise HTTPException(status_code=401, detail="Authentication required to access tasks")
         
         scheduler = get_scheduler()
-        tasks = scheduler.list_tasks(force_reload=False)
         
-        # Filter by user
-        tasks = [task for task in tasks if task.user_id == current_user_id]
+        # User's tasks, already in creation order (oldest first)
+        tasks = scheduler.list_tasks_for_user(current_user_id)
         
         # Filter by status if specified
         if status:
             tasks = [task for task in tasks if task.status.value == status.lower()]
         
-        # Sort by creation time (newest first)
-        tasks.sort(key=lambda x: x.created_at, reverse=True)
-        
-        # Apply pagination
+        # Apply pagination over newest-first order without sorting
         total = len(tasks)
-        tasks = tasks[offset:offset + limit]
+        tasks = list(islice(reversed(tasks), offset, offset + limit))
         
         # Convert to response format
         results = []
@@ -712,10 +757,7 @@ async def get_results_stats(current_user_id: Optional[str] = Depends(get_current
             raise HTTPException(status_code=401, detail="Authentication required to access task statistics")
         
         scheduler = get_scheduler()
-        tasks = scheduler.list_tasks(force_reload=False)
-        
-        # Filter by user
-        tasks = [task for task in tasks if task.user_id == current_user_id]
+        tasks = scheduler.list_tasks_for_user(current_user_id)
         
         if not tasks:
             return {
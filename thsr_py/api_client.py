@@ -5,67 +5,194 @@ Provides CLI interface that calls the API backend.
 """
 
 import json
+import os
+import random
 import sys
-from typing import Optional, Dict, Any
-import requests
+import time as _time
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable
 from datetime import datetime
 
+from .schema import STATION_MAP, STATION_COUNT, TIME_TABLE, TIME_TABLE_COUNT
+
+# Auto-detect API URL based on environment, once per process.
+# Check if running in Docker (presence of /.dockerenv or hostname matching container pattern)
+if os.path.exists('/.dockerenv') or os.environ.get('HOSTNAME', '').startswith('thsr-sniper'):
+    _DEFAULT_BASE_URL = "http://thsr-sniper-api:8000"  # Docker internal network
+else:
+    _DEFAULT_BASE_URL = "http://localhost:8000"  # Local development
+
+# (connect, read) timeouts: fail fast when the API is down, allow slow responses
+_REQUEST_TIMEOUT = (3.05, 30)
+
+# Stations and time slots are static, so cache them per hour and on disk
+_STATIC_CACHE_TTL = 3600
+_STATIC_CACHE_DIR = Path.home() / ".cache" / "thsr_sniper"
+_static_cache: Dict[tuple, Any] = {}
+
+# Display symbol for each task status (lowercase), "•" for anything else
+_STATUS_SYMBOL = {
+    "completed": "✓",
+    "success": "✓",
+    "running": "○",
+    "failed": "×",
+    "error": "×",
+}
+
+
+def _load_static_cache(name: str, base_url: str) -> Optional[Any]:
+    """Load a cached static payload from disk if it is still fresh."""
+    try:
+        with open(_STATIC_CACHE_DIR / f"{name}.json", "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("base_url") != base_url or _time.time() - cached.get("saved_at", 0) > _STATIC_CACHE_TTL:
+        return None
+    return cached.get("data")
+
+
+def _save_static_cache(name: str, base_url: str, data: Any) -> None:
+    """Persist a static payload to disk, ignoring write failures."""
+    try:
+        _STATIC_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(_STATIC_CACHE_DIR / f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump({"base_url": base_url, "saved_at": _time.time(), "data": data}, f, ensure_ascii=False)
+    except OSError:
+        pass
+
+
+def _requests_module():
+    """Import requests on first use; cached static lookups never need it."""
+    import requests
+    return requests
+
+
+def _connection_never_made(exc: Exception) -> bool:
+    """Whether a requests ConnectionError happened before any connection was established.
+    
+    Only then is it certain the server never saw the request body. Other
+    connection errors ("Connection aborted", RemoteDisconnected) can happen
+    after the server has already received it.
+    """
+    requests = _requests_module()
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    from urllib3.exceptions import NewConnectionError
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying error
+    cause = exc.args[0] if exc.args else None
+    return isinstance(getattr(cause, 'reason', cause), NewConnectionError)
+
+
+def _parse_iso_timestamp(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp, accepting a trailing 'Z' for UTC."""
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
 
 class THSRApiClient:
     """Client for interacting with THSR-Sniper API."""
     
-    def __init__(self, base_url: str = None, use_cli_auth: bool = True):
-        # Auto-detect API URL based on environment
+    def __init__(self, base_url: str = None, use_cli_auth: bool = True,
+                 max_retries: int = 3, retry_base_delay: float = 1.0):
+        internal_api = base_url is None
         if base_url is None:
-            import os
-            # Check if running in Docker (presence of /.dockerenv or hostname matching container pattern)
-            if os.path.exists('/.dockerenv') or os.environ.get('HOSTNAME', '').startswith('thsr-sniper'):
-                base_url = "http://thsr-sniper-api:8000"  # Docker internal network
-            else:
-                base_url = "http://localhost:8000"  # Local development
+            base_url = _DEFAULT_BASE_URL
         
         self.base_url = base_url.rstrip('/')
         self.use_cli_auth = use_cli_auth
+        self.max_retries = max(1, max_retries)
+        self.retry_base_delay = retry_base_delay
+        self._internal_api = internal_api
+        self._session = None
+    
+    @property
+    def session(self):
+        """Persistent session so repeated calls reuse keep-alive connections."""
+        if self._session is None:
+            requests = _requests_module()
+            from requests.adapters import HTTPAdapter
+            
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            
+            # The auto-detected API is local or on the Docker network, so skip the
+            # per-request proxy/netrc environment lookups requests would otherwise do
+            if self._internal_api:
+                session.trust_env = False
+            
+            # Add CLI internal authentication header
+            if self.use_cli_auth:
+                session.headers.update({"X-Internal-CLI": "thsr-cli-internal"})
+            self._session = session
+        return self._session
+    
+    def close(self) -> None:
+        """Close the underlying HTTP session."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+    
+    def __enter__(self) -> "THSRApiClient":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+    
+    def _backoff(self, attempt: int) -> bool:
+        """Sleep before the next retry; return False when retries are exhausted."""
+        if attempt + 1 >= self.max_retries:
+            return False
+        delay = min(self.retry_base_delay * 2 ** attempt, 30) * (1 + random.uniform(0, 0.5))
+        _time.sleep(delay)
+        return True
         
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Any]:
         """Make HTTP request to API."""
         url = f"{self.base_url}{endpoint}"
+        method = method.upper()
+        if method not in ("GET", "POST", "DELETE"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
         
-        # Add CLI internal authentication header
-        headers = {}
-        if self.use_cli_auth:
-            headers["X-Internal-CLI"] = "thsr-cli-internal"
+        requests = _requests_module()
         
-        try:
-            if method.upper() == "GET":
-                response = requests.get(url, headers=headers, timeout=30)
-            elif method.upper() == "POST":
-                response = requests.post(url, json=data, headers=headers, timeout=30)
-            elif method.upper() == "DELETE":
-                response = requests.delete(url, headers=headers, timeout=30)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+        # POST is not idempotent, so only retry it when no connection was made
+        retry_server_errors = method != "POST"
+        
+        for attempt in range(self.max_retries):
+            try:
+                response = self.session.request(method, url, json=data, timeout=_REQUEST_TIMEOUT)
+                response.raise_for_status()
+                return response.json()
                 
-            response.raise_for_status()
-            return response.json()
-            
-        except requests.exceptions.ConnectionError:
-            print(f"× Error: Cannot connect to API server at {self.base_url}")
-            print("   Make sure the API server is running:")
-            print("   docker compose up -d api")
-            sys.exit(1)
-        except requests.exceptions.Timeout:
-            print("× Error: Request timeout. API server may be overloaded.")
-            sys.exit(1)
-        except requests.exceptions.HTTPError as e:
-            print(f"× API Error: {e}")
-            if hasattr(e.response, 'text'):
-                try:
-                    error_detail = json.loads(e.response.text)
-                    print(f"   Details: {error_detail.get('detail', 'Unknown error')}")
-                except:
-                    print(f"   Response: {e.response.text}")
-            sys.exit(1)
+            except requests.exceptions.ConnectionError as e:
+                if (retry_server_errors or _connection_never_made(e)) and self._backoff(attempt):
+                    continue
+                print(f"× Error: Cannot connect to API server at {self.base_url}")
+                print("   Make sure the API server is running:")
+                print("   docker compose up -d api")
+                sys.exit(1)
+            except requests.exceptions.Timeout:
+                if retry_server_errors and self._backoff(attempt):
+                    continue
+                print("× Error: Request timeout. API server may be overloaded.")
+                sys.exit(1)
+            except requests.exceptions.HTTPError as e:
+                status_code = getattr(e.response, 'status_code', 0) or 0
+                if retry_server_errors and status_code >= 500 and self._backoff(attempt):
+                    continue
+                print(f"× API Error: {e}")
+                if hasattr(e.response, 'text'):
+                    try:
+                        error_detail = json.loads(e.response.text)
+                        print(f"   Details: {error_detail.get('detail', 'Unknown error')}")
+                    except:
+                        print(f"   Response: {e.response.text}")
+                sys.exit(1)
             
     def create_scheduled_task(
         self,
@@ -95,21 +222,17 @@ class THSRApiClient:
         }
         
         # Add optional parameters
-        if adult_cnt is not None:
-            payload["adult_cnt"] = adult_cnt
-        if student_cnt is not None:
-            payload["student_cnt"] = student_cnt
-        if time is not None:
-            payload["time"] = time
-        if train_index is not None:
-            payload["train_index"] = train_index
-        if seat_prefer is not None:
-            payload["seat_prefer"] = seat_prefer
-        if class_type is not None:
-            payload["class_type"] = class_type
-        if max_attempts is not None:
-            payload["max_attempts"] = max_attempts
-            
+        optional = {
+            "adult_cnt": adult_cnt,
+            "student_cnt": student_cnt,
+            "time": time,
+            "train_index": train_index,
+            "seat_prefer": seat_prefer,
+            "class_type": class_type,
+            "max_attempts": max_attempts
+        }
+        payload.update({key: value for key, value in optional.items() if value is not None})
+        
         return self._make_request("POST", "/schedule", payload)
     
     def list_tasks(self) -> list:
@@ -124,27 +247,49 @@ class THSRApiClient:
         """Cancel a specific task."""
         return self._make_request("DELETE", f"/tasks/{task_id}")
     
+    def _get_static(self, name: str, endpoint: str) -> Dict[str, Any]:
+        """Fetch a static endpoint through the memory and disk caches."""
+        key = (name, self.base_url, int(_time.time() // _STATIC_CACHE_TTL))
+        data = _static_cache.get(key)
+        if data is None:
+            data = _load_static_cache(name, self.base_url)
+            if data is None:
+                data = self._make_request("GET", endpoint)
+                _save_static_cache(name, self.base_url, data)
+            _static_cache[key] = data
+        return data
+    
     def get_stations(self) -> Dict[str, Any]:
         """Get list of available stations."""
-        return self._make_request("GET", "/stations")
+        return self._get_static("stations", "/stations")
     
     def get_times(self) -> Dict[str, Any]:
         """Get list of available time slots."""
-        return self._make_request("GET", "/times")
+        return self._get_static("times", "/times")
+
+
+# Global client instance shared by the CLI helpers
+_default_client: Optional[THSRApiClient] = None
+
+
+def get_default_client() -> THSRApiClient:
+    """Get the shared API client instance."""
+    global _default_client
+    if _default_client is None:
+        _default_client = THSRApiClient()
+    return _default_client
 
 
 def format_task_summary(task: Dict[str, Any], detailed: bool = False) -> None:
     """Format and print task summary."""
-    from .schema import STATION_MAP
-    
     # Get station names
-    from_name = STATION_MAP[task["from_station"] - 1] if task["from_station"] <= len(STATION_MAP) else f"Station {task['from_station']}"
-    to_name = STATION_MAP[task["to_station"] - 1] if task["to_station"] <= len(STATION_MAP) else f"Station {task['to_station']}"
+    from_name = STATION_MAP[task["from_station"] - 1] if task["from_station"] <= STATION_COUNT else f"Station {task['from_station']}"
+    to_name = STATION_MAP[task["to_station"] - 1] if task["to_station"] <= STATION_COUNT else f"Station {task['to_station']}"
     
     print(f"\n{'='*60}")
     print(f"  Task Details: {task['id'][:8]}...")
     print(f"{'='*60}")
-    status_symbol = "✓" if task['status'].lower() in ['completed', 'success'] else "○" if task['status'].lower() == 'running' else "×" if task['status'].lower() in ['failed', 'error'] else "•"
+    status_symbol = _STATUS_SYMBOL.get(task['status'].lower(), "•")
     print(f"Status: {status_symbol} {task['status'].upper()}")
     print(f"Route: {from_name} ({task['from_station']}) -> {to_name} ({task['to_station']})")
     print(f"Date: {task['date']}")
@@ -162,7 +307,7 @@ def format_task_summary(task: Dict[str, Any], detailed: bool = False) -> None:
     print(f"Attempts: {task['attempts']}")
     
     if task.get('last_attempt'):
-        last_attempt = datetime.fromisoformat(task['last_attempt'].replace('Z', '+00:00'))
+        last_attempt = _parse_iso_timestamp(task['last_attempt'])
         print(f"Last Attempt: {last_attempt.strftime('%Y-%m-%d %H:%M:%S')}")
     
     if task.get('success_pnr'):
@@ -171,39 +316,46 @@ def format_task_summary(task: Dict[str, Any], detailed: bool = False) -> None:
         print(f"× Error: {task['error_message'][:100]}...")
     
     if detailed:
-        print(f"Created: {datetime.fromisoformat(task['created_at'].replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Created: {_parse_iso_timestamp(task['created_at']).strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"Full Task ID: {task['id']}")
 
 
-def print_task_list(tasks: list) -> None:
-    """Print formatted list of tasks."""
-    if not tasks:
+def print_task_list(tasks: Iterable[Dict[str, Any]]) -> None:
+    """Print formatted list of tasks (any iterable, consumed in one pass)."""
+    # Group by status
+    status_groups = defaultdict(list)
+    total = 0
+    for task in tasks:
+        status_groups[task['status'].upper()].append(task)
+        total += 1
+    
+    if not total:
         print("\nNo scheduled booking tasks found.")
         return
     
-    # Group by status
-    status_groups = {}
-    for task in tasks:
-        status = task['status'].upper()
-        if status not in status_groups:
-            status_groups[status] = []
-        status_groups[status].append(task)
+    # Collect output lines and write them in one go
+    lines = [
+        f"\n{'='*80}",
+        f"  >> Scheduled Booking Tasks ({total} total)",
+        f"{'='*80}",
+    ]
     
-    print(f"\n{'='*80}")
-    print(f"  >> Scheduled Booking Tasks ({len(tasks)} total)")
-    print(f"{'='*80}")
+    station_map = STATION_MAP
+    station_count = STATION_COUNT
+    time_table = TIME_TABLE
+    time_count = TIME_TABLE_COUNT
     
     for status, group_tasks in status_groups.items():
-        status_symbol = "✓" if status.lower() in ['completed', 'success'] else "○" if status.lower() == 'running' else "×" if status.lower() in ['failed', 'error'] else "•"
-        print(f"\n{status_symbol} {status} ({len(group_tasks)} tasks)")
-        print("-" * 60)
+        status_symbol = _STATUS_SYMBOL.get(status.lower(), "•")
+        lines.append(f"\n{status_symbol} {status} ({len(group_tasks)} tasks)")
+        lines.append("-" * 60)
         
         for task in group_tasks:
-            from .schema import STATION_MAP
-            
             # Get station names (shortened)
-            from_short = STATION_MAP[task["from_station"] - 1][:3] if task["from_station"] <= len(STATION_MAP) else f"S{task['from_station']}"
-            to_short = STATION_MAP[task["to_station"] - 1][:3] if task["to_station"] <= len(STATION_MAP) else f"S{task['to_station']}"
+            from_station = task["from_station"]
+            to_station = task["to_station"]
+            from_short = station_map[from_station - 1][:3] if from_station <= station_count else f"S{from_station}"
+            to_short = station_map[to_station - 1][:3] if to_station <= station_count else f"S{to_station}"
             
             # Ticket summary
             tickets = []
@@ -222,9 +374,8 @@ def print_task_list(tasks: list) -> None:
             # Time info
             time_info = ""
             if task.get('time'):
-                from .schema import TIME_TABLE
-                if task['time'] <= len(TIME_TABLE):
-                    time_info = f" @{TIME_TABLE[task['time']-1]}"
+                if task['time'] <= time_count:
+                    time_info = f" @{time_table[task['time']-1]}"
                 else:
                     time_info = f" @T{task['time']}"
             elif task.get('train_index'):
@@ -237,12 +388,16 @@ def print_task_list(tasks: list) -> None:
             elif task.get('error_message'):
                 extra_info = f" | × Error: {task['error_message'][:30]}..."
             
-            task_symbol = "✓" if task['status'].lower() in ['completed', 'success'] else "○" if task['status'].lower() == 'running' else "×" if task['status'].lower() in ['failed', 'error'] else "•"
-            print(f"  {task_symbol} {task['id'][:8]}... | {status:<7} | {from_short}->{to_short} {task['date']} {ticket_str}{time_info} | Attempts: {task['attempts']} | Interval: {task['interval_minutes']}m{extra_info}")
+            # Tasks are grouped by status, so the group symbol applies
+            lines.append(f"  {status_symbol} {task['id'][:8]}... | {status:<7} | {from_short}->{to_short} {task['date']} {ticket_str}{time_info} | Attempts: {task['attempts']} | Interval: {task['interval_minutes']}m{extra_info}")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
 
 
-def show_task_status(client: THSRApiClient, task_id: str) -> None:
+def show_task_status(client: Optional[THSRApiClient], task_id: str) -> None:
     """Show detailed status of a specific task."""
+    client = client or get_default_client()
     try:
         task = client.get_task_status(task_id)
         format_task_summary(task, detailed=True)
@@ -250,8 +405,9 @@ def show_task_status(client: THSRApiClient, task_id: str) -> None:
         print(f"× Task '{task_id}' not found or API error.")
 
 
-def cancel_task_interactive(client: THSRApiClient, task_id: str) -> None:
+def cancel_task_interactive(client: Optional[THSRApiClient], task_id: str) -> None:
     """Cancel a task with confirmation."""
+    client = client or get_default_client()
     try:
         # Get task details first
         task = client.get_task_status(task_id)
@@ -275,8 +431,11 @@ def cancel_task_interactive(client: THSRApiClient, task_id: str) -> None:
 
 def schedule_booking_via_api(args) -> None:
     """Schedule a booking task via API (called from main.py)."""
-    client = THSRApiClient()
-    
+    _schedule_booking(get_default_client(), args)
+
+
+def _schedule_booking(client: THSRApiClient, args) -> None:
+    """Create the task and show its status over a single client session."""
     try:
         # Validate required parameters
         if not hasattr(args, 'from_') or args.from_ is None:
@@ -329,8 +488,8 @@ def schedule_booking_via_api(args) -> None:
         print(f"Task ID: {result['task_id']}")
         print(f"Message: {result['message']}")
         
-        # Get and show task details
-        task = client.get_task_status(result['task_id'])
+        # Show task details, fetching them only if the API did not return them
+        task = result.get('task') or client.get_task_status(result['task_id'])
         format_task_summary(task, detailed=True)
         
         print(f"\n>> Use the following commands to manage your task:")
@@ -344,7 +503,7 @@ def schedule_booking_via_api(args) -> None:
 
 def list_tasks_via_api() -> None:
     """List all tasks via API."""
-    client = THSRApiClient()
+    client = get_default_client()
     tasks = client.list_tasks()
     
     print(f"\n>> Scheduler Status")
@@ -365,7 +524,7 @@ if __name__ == "__main__":
     
     args = parser.parse_args()
     
-    client = THSRApiClient()
+    client = get_default_client()
     
     if args.list:
         list_tasks_via_api()
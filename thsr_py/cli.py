@@ -2,54 +2,52 @@ from __future__ import annotations
 
 import argparse
 import os
+import re
 from datetime import datetime, timedelta
 
+# Terminal type is fixed for the lifetime of the process
+_TERM = os.environ.get('TERM', '')
+
+# Year-first (YYYY/MM/DD) or year-last (MM/DD/YYYY, DD/MM/YYYY) dates
+_DATE_RE = re.compile(
+    r'^(?P<y>\d{4})(?P<s1>[-/])(?P<m>\d{1,2})(?P=s1)(?P<d>\d{1,2})$'
+    r'|^(?P<a>\d{1,2})(?P<s2>[-/])(?P<b>\d{1,2})(?P=s2)(?P<c>\d{4})$'
+)
+_DATE_FORMATS = ("%Y/%m/%d", "%Y-%m-%d", "%m/%d/%Y", "%m-%d-%Y", "%d/%m/%Y", "%d-%m-%Y")
+
+
+# ANSI color codes for 256-color terminals - using THSR theme color #ca4f0f
+_THSR_RED = '\033[38;5;166m'  # Close to #ca4f0f
+_THSR_DARK = '\033[38;5;124m'  # Darker variant
+_ACCENT = '\033[38;5;220m'     # Yellow accent
+_RESET = '\033[0m'
+
+# Banner art with {C}/{R} placeholders for the line color and reset codes
+_BANNER_TEMPLATE = r"""{C}╔══════════════════════════════════════════════════════════════════════════════╗{R}
+{C}║       ________  _______ ____              _____       _                      ║{R}
+{C}║      /_  __/ / / / ___// __ \            / ___/____  (_)___  ___  _____      ║{R}
+{C}║       / / / /_/ /\__ \/ /_/ /  ______    \__ \/ __ \/ / __ \/ _ \/ ___/      ║{R}
+{C}║      / / / __  /___/ / _, _/  /_____/   ___/ / / / / / /_/ /  __/ /          ║{R}
+{C}║     /_/ /_/ /_//____/_/ |_|            /____/_/ /_/_/ .___/\___/_/           ║{R}
+{C}║                                                    /_/                       ║{R}
+{C}║                                                                              ║{R}
+{C}║                    Taiwan High Speed Rail Ticket Sniper                      ║{R}
+{C}║                                                                              ║{R}
+{C}║    A modern CLI tool for booking THSR tickets with intelligent automation.   ║{R}
+{C}║    Features automatic captcha recognition and comprehensive booking flow.    ║{R}
+{C}║                                                                              ║{R}
+{C}╚══════════════════════════════════════════════════════════════════════════════╝{R}
+        """
+
+_BANNER_COLORED = _BANNER_TEMPLATE.format(C=_THSR_RED, R=_RESET)
+# Fallback for terminals without color support
+_BANNER_PLAIN = "\n" + _BANNER_TEMPLATE.format(C="", R="")
+
 
 def _get_colored_banner() -> str:
     """Get colored ASCII art banner for the CLI."""
     # Check if we're in a terminal that supports colors
-    if os.environ.get('TERM') and '256' in os.environ.get('TERM', ''):
-        # ANSI color codes for 256-color terminals - using THSR theme color #ca4f0f
-        thsr_red = '\033[38;5;166m'  # Close to #ca4f0f
-        thsr_dark = '\033[38;5;124m'  # Darker variant
-        accent = '\033[38;5;220m'     # Yellow accent
-        reset = '\033[0m'
-        
-        banner = f"""{thsr_red}╔══════════════════════════════════════════════════════════════════════════════╗{reset}
-{thsr_red}║       ________  _______ ____              _____       _                      ║{reset}
-{thsr_red}║      /_  __/ / / / ___// __ \\            / ___/____  (_)___  ___  _____      ║{reset}
-{thsr_red}║       / / / /_/ /\\__ \\/ /_/ /  ______    \\__ \\/ __ \\/ / __ \\/ _ \\/ ___/      ║{reset}
-{thsr_red}║      / / / __  /___/ / _, _/  /_____/   ___/ / / / / / /_/ /  __/ /          ║{reset}
-{thsr_red}║     /_/ /_/ /_//____/_/ |_|            /____/_/ /_/_/ .___/\\___/_/           ║{reset}
-{thsr_red}║                                                    /_/                       ║{reset}
-{thsr_red}║                                                                              ║{reset}
-{thsr_red}║                    Taiwan High Speed Rail Ticket Sniper                      ║{reset}
-{thsr_red}║                                                                              ║{reset}
-{thsr_red}║    A modern CLI tool for booking THSR tickets with intelligent automation.   ║{reset}
-{thsr_red}║    Features automatic captcha recognition and comprehensive booking flow.    ║{reset}
-{thsr_red}║                                                                              ║{reset}
-{thsr_red}╚══════════════════════════════════════════════════════════════════════════════╝{reset}
-        """
-    else:
-        # Fallback for terminals without color support
-        banner = r"""
-╔══════════════════════════════════════════════════════════════════════════════╗
-║       ________  _______ ____              _____       _                      ║
-║      /_  __/ / / / ___// __ \            / ___/____  (_)___  ___  _____      ║
-║       / / / /_/ /\__ \/ /_/ /  ______    \__ \/ __ \/ / __ \/ _ \/ ___/      ║
-║      / / / __  /___/ / _, _/  /_____/   ___/ / / / / / /_/ /  __/ /          ║
-║     /_/ /_/ /_//____/_/ |_|            /____/_/ /_/_/ .___/\___/_/           ║
-║                                                    /_/                       ║
-║                                                                              ║
-║                    Taiwan High Speed Rail Ticket Sniper                      ║
-║                                                                              ║
-║    A modern CLI tool for booking THSR tickets with intelligent automation.   ║
-║    Features automatic captcha recognition and comprehensive booking flow.    ║
-║                                                                              ║
-╚══════════════════════════════════════════════════════════════════════════════╝
-        """
-    
-    return banner
+    return _BANNER_COLORED if '256' in _TERM else _BANNER_PLAIN
 
 
 def parse_args() -> argparse.Namespace:
@@ -267,12 +265,22 @@ def _parse_date_input(date_input: str) -> str:
         return datetime.now().strftime("%Y/%m/%d")
     
     # Handle various date formats
-    date_formats = [
-        "%Y/%m/%d", "%Y-%m-%d", "%Y/%m/%d", "%Y-%m-%d",
-        "%m/%d/%Y", "%m-%d-%Y", "%d/%m/%Y", "%d-%m-%Y"
-    ]
+    match = _DATE_RE.match(date_input)
+    if match:
+        if match.group('y'):
+            candidates = [(match.group('y'), match.group('m'), match.group('d'))]
+        else:
+            # Month-first takes precedence over day-first
+            a, b, year = match.group('a', 'b', 'c')
+            candidates = [(year, a, b), (year, b, a)]
+        for year, month, day in candidates:
+            try:
+                return datetime(int(year), int(month), int(day)).strftime("%Y/%m/%d")
+            except ValueError:
+                continue
+        return date_input
     
-    for fmt in date_formats:
+    for fmt in _DATE_FORMATS:
         try:
             parsed_date = datetime.strptime(date_input, fmt)
             return parsed_date.strftime("%Y/%m/%d")
@@ -1,16 +1,44 @@
 from __future__ import annotations
 
+import functools
+import hashlib
+import importlib.util
+import io
+import logging
 import os
+import queue
+import random
 import sys
 import tempfile
+import threading
+import time
+import uuid
+import warnings
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from pathlib import Path
+from types import MappingProxyType
 
-import requests
-from bs4 import BeautifulSoup
+# requests and BeautifulSoup are imported on first use so that --help,
+# --stations and --times do not pay for the HTTP/HTML stack
+if TYPE_CHECKING:
+    import requests
+    from bs4 import BeautifulSoup
 
-from .schema import STATION_MAP, TIME_TABLE, TicketType, find_closest_train_within_range
+# Prefer the C lxml parser backend for BeautifulSoup when it is installed
+_HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+from .cli import _get_colored_banner
+from .schema import (
+    STATION_MAP, STATION_COUNT, TIME_TABLE, TIME_TABLE_COUNT, TicketType,
+    find_closest_train_within_range, format_time_slot
+)
+
+# Terminal color support and banner are fixed for the lifetime of the process
+_SUPPORTS_256 = '256' in os.environ.get('TERM', '')
+_BANNER_STR = _get_colored_banner()
 
 BASE_URL = "https://irs.thsrc.com.tw"
 BOOKING_PAGE_URL = f"{BASE_URL}/IMINT/?locale=tw"
@@ -24,6 +52,71 @@ CONFIRM_TICKET_URL = (
     "https://irs.thsrc.com.tw/IMINT/?wicket:interface=:2:BookingS3Form::IFormSubmitListener"
 )
 
+# CSS selectors used on every booking attempt, compiled once by _css()
+_SEL_ERROR = "span.feedbackPanelERROR"
+_SEL_CAPTCHA_IMG = "#BookingS1Form_homeCaptcha_passCode"
+_SEL_TO_TIME = "#toTimeInputField"
+_SEL_TRIPCON = "#BookingS1Form_tripCon_typesoftrip"
+_SEL_SELECTED = "[selected='selected']"
+_SEL_BOOKING_METHOD = "input[name='bookingMethod']"
+_SEL_ALERTS = "ul.alert-body > li"
+_SEL_RESULT_ITEM = "label.result-item"
+_SEL_INPUT = "input"
+_SEL_EARLY_BIRD_DISCOUNT = "p.early-bird span"
+_SEL_STUDENT_DISCOUNT = "p.student span"
+_SEL_MEMBER_RADIO = "#memberSystemRadio1"
+_SEL_NON_MEMBER_RADIO = "#memberSystemRadio3"
+_SEL_EARLY = ".superEarlyBird"
+_SEL_EARLY_TYPE = (
+    "input[name='TicketPassengerInfoInputPanel:passengerDataView:0:passengerDataView2:passengerDataTypeName']"
+)
+
+# Restrict parsing to the elements each page's helpers read. The booking page
+# needs the captcha <img>, date/booking-method <input>s and the trip <select>;
+# the train page needs error <span>s, alert <ul>s and the train <label>s.
+_BOOKING_PAGE_TAGS = ("img", "input", "select")
+_TRAIN_PAGE_TAGS = ("span", "ul", "label")
+
+
+@functools.lru_cache(maxsize=None)
+def _css(pattern: str):
+    """Compile a CSS selector once."""
+    import soupsieve
+    return soupsieve.compile(pattern)
+
+
+@functools.lru_cache(maxsize=None)
+def _strainer(tags: Tuple[str, ...]):
+    """Build a SoupStrainer that keeps only the given tags."""
+    from bs4 import SoupStrainer
+    return SoupStrainer(list(tags))
+
+
+@functools.lru_cache(maxsize=1)
+def _http_adapter():
+    """Connection pool shared by all booking sessions.
+
+    Repeated attempts reuse keep-alive TLS connections while each attempt
+    keeps its own cookies/headers. Failed connects are retried for every
+    method; read and status retries stay limited to urllib3's idempotent
+    methods so a form POST is never re-submitted.
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    retry = Retry(
+        total=3,
+        connect=2,
+        read=2,
+        backoff_factor=0.2,
+        status_forcelist=(429, 500, 502, 503, 504),
+    )
+    return HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+
+
+# Background worker that downloads the captcha while the journey is configured
+_CAPTCHA_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thsr-captcha")
+
 
 def _print_header(title: str) -> None:
     """Print a formatted header with THSR banner."""
@@ -39,47 +132,7 @@ def _print_header(title: str) -> None:
 
 def _print_thsr_banner() -> None:
     """Print the THSR-Sniper banner with colors."""
-    # Check if we're in a terminal that supports colors
-    if os.environ.get('TERM') and '256' in os.environ.get('TERM', ''):
-        # ANSI color codes for 256-color terminals - using THSR theme color #ca4f0f
-        thsr_red = '\033[38;5;166m'  # Close to #ca4f0f
-        reset = '\033[0m'
-        
-        banner = f"""{thsr_red}╔══════════════════════════════════════════════════════════════════════════════╗{reset}
-{thsr_red}║       ________  _______ ____              _____       _                      ║{reset}
-{thsr_red}║      /_  __/ / / / ___// __ \\            / ___/____  (_)___  ___  _____      ║{reset}
-{thsr_red}║       / / / /_/ /\\__ \\/ /_/ /  ______    \\__ \\/ __ \\/ / __ \\/ _ \\/ ___/      ║{reset}
-{thsr_red}║      / / / __  /___/ / _, _/  /_____/   ___/ / / / / / /_/ /  __/ /          ║{reset}
-{thsr_red}║     /_/ /_/ /_//____/_/ |_|            /____/_/ /_/_/ .___/\\___/_/           ║{reset}
-{thsr_red}║                                                    /_/                       ║{reset}
-{thsr_red}║                                                                              ║{reset}
-{thsr_red}║                    Taiwan High Speed Rail Ticket Sniper                      ║{reset}
-{thsr_red}║                                                                              ║{reset}
-{thsr_red}║    A modern CLI tool for booking THSR tickets with intelligent automation.   ║{reset}
-{thsr_red}║    Features automatic captcha recognition and comprehensive booking flow.    ║{reset}
-{thsr_red}║                                                                              ║{reset}
-{thsr_red}╚══════════════════════════════════════════════════════════════════════════════╝{reset}
-        """
-        print(banner)
-    else:
-        # Fallback for terminals without color support
-        banner = r"""
-╔══════════════════════════════════════════════════════════════════════════════╗
-║       ________  _______ ____              _____       _                      ║
-║      /_  __/ / / / ___// __ \            / ___/____  (_)___  ___  _____      ║
-║       / / / /_/ /\__ \/ /_/ /  ______    \__ \/ __ \/ / __ \/ _ \/ ___/      ║
-║      / / / __  /___/ / _, _/  /_____/   ___/ / / / / / /_/ /  __/ /          ║
-║     /_/ /_/ /_//____/_/ |_|            /____/_/ /_/_/ .___/\___/_/           ║
-║                                                    /_/                       ║
-║                                                                              ║
-║                    Taiwan High Speed Rail Ticket Sniper                      ║
-║                                                                              ║
-║    A modern CLI tool for booking THSR tickets with intelligent automation.   ║
-║    Features automatic captcha recognition and comprehensive booking flow.    ║
-║                                                                              ║
-╚══════════════════════════════════════════════════════════════════════════════╝
-        """
-        print(banner)
+    print(_BANNER_STR)
 
 
 def _print_section(title: str) -> None:
@@ -89,41 +142,36 @@ def _print_section(title: str) -> None:
     print(f"{'-'*40}")
 
 
+# Headers that are identical for every booking session
+_STATIC_HEADERS = MappingProxyType({
+    "Host": "irs.thsrc.com.tw",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "zh-TW,zh;q=0.8,en-US;q=0.5,en;q=0.3",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+    "Referer": "https://irs.thsrc.com.tw/IMINT/",
+    "Sec-Fetch-Site": "same-origin",
+    "Sec-Fetch-Mode": "no-cors",
+    "X-Requested-With": "XMLHttpRequest",
+    "Cache-Control": "no-cache",
+    "Pragma": "no-cache",
+})
+_WINDOWS_VERSIONS = ("10.0", "11.0")
+_FIREFOX_MAJOR_VERSIONS = (137, 136, 138)
+
+
 def _headers() -> Dict[str, str]:
-    import random
-    import time
-    import uuid
-    
-    # Generate unique session-like identifiers for each request
-    session_id = f"{random.randint(100000, 999999)}_{int(time.time())}"
-    device_id = str(uuid.uuid4())[:8]
-    browser_version = f"137.{random.randint(0, 9)}"
-    
     # Randomize some header values to simulate different users/devices
-    windows_versions = ["10.0", "11.0"]
-    firefox_versions = [f"137.{random.randint(0, 9)}", f"136.{random.randint(0, 9)}", f"138.{random.randint(0, 9)}"]
-    
-    selected_windows = random.choice(windows_versions)
-    selected_firefox = random.choice(firefox_versions)
-    
-    return {
-        "Host": "irs.thsrc.com.tw",
-        "User-Agent": f"Mozilla/5.0 (Windows NT {selected_windows}; Win64; x64; rv:{selected_firefox}) Gecko/20100101 Firefox/{selected_firefox}",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "zh-TW,zh;q=0.8,en-US;q=0.5,en;q=0.3",
-        "Accept-Encoding": "deflate, br",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-        "Referer": "https://irs.thsrc.com.tw/IMINT/",
-        "Sec-Fetch-Site": "same-origin",
-        "Sec-Fetch-Mode": "no-cors",
-        # Add session-like headers to make each request appear unique
-        "X-Requested-With": "XMLHttpRequest",
-        "X-Session-ID": session_id,
-        "X-Device-ID": device_id,
-        "Cache-Control": "no-cache",
-        "Pragma": "no-cache",
-    }
+    selected_windows = random.choice(_WINDOWS_VERSIONS)
+    selected_firefox = f"{random.choice(_FIREFOX_MAJOR_VERSIONS)}.{random.randint(0, 9)}"
+    
+    headers = dict(_STATIC_HEADERS)
+    headers["User-Agent"] = f"Mozilla/5.0 (Windows NT {selected_windows}; Win64; x64; rv:{selected_firefox}) Gecko/20100101 Firefox/{selected_firefox}"
+    # Add session-like headers to make each request appear unique
+    headers["X-Session-ID"] = f"{random.randint(100000, 999999)}_{int(time.time())}"
+    headers["X-Device-ID"] = str(uuid.uuid4())[:8]
+    return headers
 
 
 def _get_input(prompt: str, default, choices: Optional[List] = None) -> any:
@@ -171,55 +219,92 @@ def _get_input(prompt: str, default, choices: Optional[List] = None) -> any:
         return val
 
 
+def _parse(r: requests.Response, only_tags: Optional[Tuple[str, ...]] = None) -> BeautifulSoup:
+    """Parse a booking page from its raw bytes, skipping the requests text decode."""
+    from bs4 import BeautifulSoup
+    
+    # Only trust r.encoding when the server declared a charset; otherwise
+    # requests falls back to ISO-8859-1 and the parser should sniff instead
+    declared = "charset=" in r.headers.get("Content-Type", "").lower()
+    return BeautifulSoup(
+        r.content,
+        _HTML_PARSER,
+        parse_only=_strainer(only_tags) if only_tags else None,
+        from_encoding=r.encoding if declared else None,
+    )
+
+
 def _parse_error(soup: BeautifulSoup) -> Optional[str]:
-    errors = [e.get_text(strip=True) for e in soup.select("span.feedbackPanelERROR")]
+    errors = [e.get_text(strip=True) for e in _css(_SEL_ERROR).select(soup)]
     return "\n".join(errors) if errors else None
 
 
+def _response_error(r: requests.Response, soup: BeautifulSoup) -> Optional[str]:
+    """Return the page's error feedback, skipping the tree search when there is none."""
+    if b"feedbackPanelERROR" not in r.content:
+        return None
+    return _parse_error(soup)
+
+
+_STATION_TABLE_TEXT = "\n".join(
+    ["ID  | Station Name", "----|-------------"]
+    + [f"{idx:2d}  | {name}" for idx, name in enumerate(STATION_MAP, start=1)]
+)
+
+
 def show_station() -> None:
     """Display all available stations in a modern format."""
     _print_header("Available Stations")
-    print("ID  | Station Name")
-    print("----|-------------")
-    for idx, name in enumerate(STATION_MAP, start=1):
-        print(f"{idx:2d}  | {name}")
+    print(_STATION_TABLE_TEXT)
     # print(f"\nTotal: {len(STATION_MAP)} stations")
 
 
+def _build_time_table_text() -> str:
+    """Render TIME_TABLE as a 4-column ID/time table."""
+    cells = [f"{idx:2d}  | {format_time_slot(t_str)}" for idx, t_str in enumerate(TIME_TABLE, start=1)]
+    cells += ["    |      "] * (-len(cells) % 4)
+    rows = [" | ".join(cells[i:i + 4]) for i in range(0, len(cells), 4)]
+    return "\n".join([
+        "ID  | Time  | ID  | Time  | ID  | Time  | ID  | Time",
+        "----|-------|-----|-------|-----|-------|-----|------",
+    ] + rows)
+
+
+_TIME_TABLE_TEXT = _build_time_table_text()
+
+
 def show_time_table() -> None:
     """Display all available departure times in a modern format."""
     _print_header("Available Departure Times")
-    print("ID  | Time  | ID  | Time  | ID  | Time  | ID  | Time")
-    print("----|-------|-----|-------|-----|-------|-----|------")
-    
-    for i in range(0, len(TIME_TABLE), 4):
-        row = []
-        for j in range(4):
-            idx = i + j
-            if idx < len(TIME_TABLE):
-                t_str = TIME_TABLE[idx]
-                t_int = int(t_str[:-1])
-                if t_str.endswith("A") and t_int // 100 == 12:
-                    t_int %= 1200
-                elif t_int != 1230 and t_str.endswith("P"):
-                    t_int += 1200
-                formatted_time = f"{t_int:04d}"
-                time_str = f"{formatted_time[:-2]}:{formatted_time[-2:]}"
-                row.append(f"{idx+1:2d}  | {time_str}")
-            else:
-                row.append("    |      ")
-        print(" | ".join(row))
+    print(_TIME_TABLE_TEXT)
     
     # print(f"\nTotal: {len(TIME_TABLE)} time slots")
 
 
-def run(args) -> None:
-    """Main booking flow with modern interface."""
-    _print_header("THSR-Sniper")
+def _new_session() -> requests.Session:
+    """Create a booking session backed by the shared connection pool."""
+    import requests
     
     session = requests.Session()
+    session.mount("https://", _http_adapter())
     session.headers.update(_headers())
     session.max_redirects = 20
+    return session
+
+
+@dataclass
+class BookingResult:
+    """Outcome of a booking flow run."""
+    success: bool = False
+    pnr: Optional[str] = None
+    error: Optional[str] = None
+
+
+def run(args) -> BookingResult:
+    """Main booking flow with modern interface."""
+    _print_header("THSR-Sniper")
+    
+    session = _new_session()
 
     # First page
     _print_section("Step 1: Initializing Booking Session")
@@ -231,45 +316,30 @@ def run(args) -> None:
         print("✓ Connected successfully")
     except Exception as e:
         print(f"✗ Connection failed: {e}")
-        return
-
-    # Parse JSESSIONID
-    jsession = None
-    for c in session.cookies:
-        if c.name == "JSESSIONID":
-            jsession = c.value
-            break
-    if not jsession:
-        # Fallback try from response cookies
-        for c in r.cookies:
-            if c.name == "JSESSIONID":
-                jsession = c.value
-                break
+        return BookingResult(error=f"Connection failed: {e}")
+
+    # Parse JSESSIONID, falling back to the response cookies
+    jsession = _get_cookie(session.cookies, "JSESSIONID") or _get_cookie(r.cookies, "JSESSIONID")
     if not jsession:
         print("✗ Error: Cannot establish session")
-        return
+        return BookingResult(error="Cannot establish session")
 
     print("✓ Session established")
 
-    soup = BeautifulSoup(r.text, "html.parser")
+    soup = _parse(r, _BOOKING_PAGE_TAGS)
 
-    # Security code image
-    _print_section("Step 2: Security Verification")
-    img_src = soup.select_one("#BookingS1Form_homeCaptcha_passCode").get("src")
-    img_url = f"{BASE_URL}{img_src}"
-    
-    try:
-        img_r = session.get(img_url, timeout=60)
-        img_r.raise_for_status()
-        print("✓ Captcha image downloaded")
-    except Exception as e:
-        print(f"✗ Failed to download captcha: {e}")
-        return
+    # Load the OCR model in the background while the captcha downloads
+    if not getattr(args, "no_ocr", False) and _ocr_model_cache is None:
+        threading.Thread(target=_get_ocr_model, daemon=True).start()
 
-    _show_image(img_r.content)
+    # Security code image, fetched while the journey is configured below.
+    # The session is not used by this thread until the download is collected.
+    img_src = _css(_SEL_CAPTCHA_IMG).select_one(soup).get("src")
+    img_url = f"{BASE_URL}{img_src}"
+    captcha_future = _CAPTCHA_EXECUTOR.submit(_download_captcha, session, img_url)
 
     # Build payload
-    _print_section("Step 3: Journey Configuration")
+    _print_section("Step 2: Journey Configuration")
     payload = _BookingPayload.default()
     payload.search_by = _parse_search_by(soup)
     payload.types_of_trip = _parse_types_of_trip_value(soup)
@@ -316,7 +386,17 @@ def run(args) -> None:
     payload.select_seat_prefer(getattr(args, "seat_prefer", None))
     payload.select_class_type(getattr(args, "class_type", None))
 
-    payload.input_security_code(img_r.content, not getattr(args, "no_ocr", False))
+    _print_section("Step 3: Security Verification")
+    try:
+        img_bytes = captcha_future.result()
+        print("✓ Captcha image downloaded")
+    except Exception as e:
+        print(f"✗ Failed to download captcha: {e}")
+        return BookingResult(error=f"Failed to download captcha: {e}")
+
+    _show_image(img_bytes)
+
+    payload.input_security_code(img_bytes, not getattr(args, "no_ocr", False))
 
     # Submit booking request
     _print_section("Step 4: Submitting Booking Request")
@@ -333,13 +413,13 @@ def run(args) -> None:
         print("✓ Booking request submitted")
     except Exception as e:
         print(f"✗ Booking request failed: {e}")
-        return
+        return BookingResult(error=f"Booking request failed: {e}")
 
-    soup = BeautifulSoup(r.text, "html.parser")
-    err = _parse_error(soup)
+    soup = _parse(r, _TRAIN_PAGE_TAGS)
+    err = _response_error(r, soup)
     if err:
         print(f"✗ Booking error: {err}")
-        return
+        return BookingResult(error=f"Booking error: {err}")
 
     # Second page
     _print_section("Step 5: Train Selection")
@@ -347,36 +427,60 @@ def run(args) -> None:
     target_time_idx = getattr(args, "time", None)
     soup = _confirm_train_flow(session, soup, train_index, target_time_idx)
     if soup is None:
-        return
+        return BookingResult(error="Train selection failed")
 
     # Final page
     _print_section("Step 6: Final Confirmation")
     soup = _confirm_ticket_flow(session, soup, args)
     if soup is None:
-        return
+        return BookingResult(error="Ticket confirmation failed")
 
     _print_section("Booking Complete")
-    _show_result(soup)
+    pnr = _show_result(soup)
+    return BookingResult(success=True, pnr=pnr)
+
+
+def _get_cookie(jar, name: str) -> Optional[str]:
+    """Look up a cookie value by name, taking the first match if several paths set it."""
+    from requests.cookies import CookieConflictError
+    
+    try:
+        return jar.get(name)
+    except CookieConflictError:
+        return next((c.value for c in jar if c.name == name), None)
+
+
+def _download_captcha(session: requests.Session, img_url: str) -> bytes:
+    """Download the captcha image for the current booking session."""
+    img_r = session.get(img_url, timeout=60)
+    img_r.raise_for_status()
+    return img_r.content
 
 
 def _parse_avail_start_end_date(soup: BeautifulSoup) -> Tuple[str, str]:
-    elem = soup.select_one("#toTimeInputField")
+    elem = _css(_SEL_TO_TIME).select_one(soup)
     return elem.get("date"), elem.get("limit")
 
 
 def _parse_types_of_trip_value(soup: BeautifulSoup) -> int:
-    elem = soup.select_one("#BookingS1Form_tripCon_typesoftrip")
-    sel = elem.select_one("[selected='selected']")
+    elem = _css(_SEL_TRIPCON).select_one(soup)
+    sel = _css(_SEL_SELECTED).select_one(elem)
     return int(sel.get("value"))
 
 
 def _parse_search_by(soup: BeautifulSoup) -> str:
-    for tag in soup.select("input[name='bookingMethod']"):
+    for tag in _css(_SEL_BOOKING_METHOD).select(soup):
         if tag.has_attr("checked"):
             return tag.get("value")
     return "1"
 
 
+# Valid answers for the interactive prompts
+_STATION_CHOICES = list(range(1, STATION_COUNT + 1))
+_TIME_CHOICES = list(range(1, TIME_TABLE_COUNT + 1))
+_TICKET_COUNT_CHOICES = list(range(0, 11))
+
+
 @dataclass
 class _BookingPayload:
     start_station: int = 1
@@ -399,28 +503,47 @@ class _BookingPayload:
     elder_ticket_num: str = "0E"
     college_ticket_num: str = "0P"
 
+    # Form field names, in the same order as the values built in to_form
+    _FORM_KEYS = (
+        "selectStartStation",
+        "selectDestinationStation",
+        "bookingMethod",
+        "tripCon:typesoftrip",
+        "toTimeInputField",
+        "toTimeTable",
+        "homeCaptcha:securityCode",
+        "seatCon:seatRadioGroup",
+        "BookingS1Form:hf:0",
+        "trainCon:trainRadioGroup",
+        "ticketPanel:rows:0:ticketAmount",
+        "ticketPanel:rows:1:ticketAmount",
+        "ticketPanel:rows:2:ticketAmount",
+        "ticketPanel:rows:3:ticketAmount",
+        "ticketPanel:rows:4:ticketAmount",
+    )
+
     @staticmethod
     def default() -> "_BookingPayload":
         return _BookingPayload()
 
     def to_form(self) -> Dict[str, str]:
-        d = {
-            "selectStartStation": str(self.start_station),
-            "selectDestinationStation": str(self.dest_station),
-            "bookingMethod": self.search_by,
-            "tripCon:typesoftrip": str(self.types_of_trip),
-            "toTimeInputField": self.outbound_date,
-            "toTimeTable": self.outbound_time,
-            "homeCaptcha:securityCode": self.security_code,
-            "seatCon:seatRadioGroup": str(self.seat_prefer),
-            "BookingS1Form:hf:0": self.form_mark,
-            "trainCon:trainRadioGroup": str(self.class_type),
-            "ticketPanel:rows:0:ticketAmount": self.adult_ticket_num,
-            "ticketPanel:rows:1:ticketAmount": self.child_ticket_num,
-            "ticketPanel:rows:2:ticketAmount": self.disabled_ticket_num,
-            "ticketPanel:rows:3:ticketAmount": self.elder_ticket_num,
-            "ticketPanel:rows:4:ticketAmount": self.college_ticket_num,
-        }
+        d = dict(zip(self._FORM_KEYS, (
+            str(self.start_station),
+            str(self.dest_station),
+            self.search_by,
+            str(self.types_of_trip),
+            self.outbound_date,
+            self.outbound_time,
+            self.security_code,
+            str(self.seat_prefer),
+            self.form_mark,
+            str(self.class_type),
+            self.adult_ticket_num,
+            self.child_ticket_num,
+            self.disabled_ticket_num,
+            self.elder_ticket_num,
+            self.college_ticket_num,
+        )))
         if self.inbound_date:
             d["backTimeInputField"] = self.inbound_date
         if self.inbound_time:
@@ -436,16 +559,16 @@ class _BookingPayload:
             self.start_station = int(from_idx)
             return
         show_station()
-        inp = _get_input("Select departure station (default: 1):", 1, list(range(1, len(STATION_MAP) + 1)))
-        self.start_station = inp if 1 <= inp <= len(STATION_MAP) else 1
+        inp = _get_input("Select departure station (default: 1):", 1, _STATION_CHOICES)
+        self.start_station = inp if 1 <= inp <= STATION_COUNT else 1
 
     def select_dest_station(self, to_idx: Optional[int]) -> None:
         if to_idx is not None:
             self.dest_station = int(to_idx)
             return
         show_station()
-        inp = _get_input("Select arrival station (default: 12):", 12, list(range(1, len(STATION_MAP) + 1)))
-        self.dest_station = inp if 1 <= inp <= len(STATION_MAP) else 12
+        inp = _get_input("Select arrival station (default: 12):", 12, _STATION_CHOICES)
+        self.dest_station = inp if 1 <= inp <= STATION_COUNT else 12
 
     def _normalize_date(self, s: str) -> Optional[str]:
         try:
@@ -490,8 +613,8 @@ class _BookingPayload:
     def select_time(self, time_idx: Optional[int]) -> None:
         if time_idx is None:
             show_time_table()
-            time_idx = _get_input("Select departure time (default: 10):", 10, list(range(1, len(TIME_TABLE) + 1)))
-        if time_idx > len(TIME_TABLE):
+            time_idx = _get_input("Select departure time (default: 10):", 10, _TIME_CHOICES)
+        if time_idx > TIME_TABLE_COUNT:
             print("Invalid input, defaulting to 10.")
             self.outbound_time = TIME_TABLE[9]
         else:
@@ -502,7 +625,7 @@ class _BookingPayload:
                     val = _get_input(
             f"Select number of {ticket_type} tickets (0-10, default: 1)",
             1,
-            list(range(0, 11))
+            _TICKET_COUNT_CHOICES
         )
         if val > 10:
             print("Invalid input, defaulting to 1.")
@@ -571,7 +694,7 @@ class _BookingPayload:
 
 
 def _confirm_train_flow(session: requests.Session, soup: BeautifulSoup, train_index: Optional[int] = None, target_time_idx: Optional[int] = None) -> Optional[BeautifulSoup]:
-    alerts = [e.get_text(strip=True) for e in soup.select("ul.alert-body > li")]
+    alerts = [e.get_text(strip=True) for e in _css(_SEL_ALERTS).select(soup)]
     if alerts:
         print("\n".join(alerts))
 
@@ -588,7 +711,7 @@ def _confirm_train_flow(session: requests.Session, soup: BeautifulSoup, train_in
         selected_train = trains[train_index - 1]["form_value"]
         train_id = trains[train_index - 1]["id"]
         print(f"✓ Selected train {train_id} (index {train_index}) automatically")
-    elif target_time_idx and target_time_idx >= 1 and target_time_idx <= len(TIME_TABLE):
+    elif target_time_idx and target_time_idx >= 1 and target_time_idx <= TIME_TABLE_COUNT:
         # Auto-booking mode: find closest train within ±30 minutes of target time
         closest_train = find_closest_train_within_range(trains, target_time_idx, tolerance_hours=0.5)
         if closest_train:
@@ -611,8 +734,8 @@ def _confirm_train_flow(session: requests.Session, soup: BeautifulSoup, train_in
         timeout=60,
     )
     r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
-    err = _parse_error(soup)
+    soup = _parse(r)
+    err = _response_error(r, soup)
     if err:
         print(f"✗ Error: {err}")
         return None
@@ -621,8 +744,8 @@ def _confirm_train_flow(session: requests.Session, soup: BeautifulSoup, train_in
 
 def _parse_trains(soup: BeautifulSoup) -> List[Dict[str, str]]:
     items = []
-    for label in soup.select("label.result-item"):
-        inp = label.select_one("input")
+    for label in _css(_SEL_RESULT_ITEM).select(soup):
+        inp = _css(_SEL_INPUT).select_one(label)
         items.append(
             {
                 "id": inp.get("querycode"),
@@ -638,10 +761,10 @@ def _parse_trains(soup: BeautifulSoup) -> List[Dict[str, str]]:
 
 def _parse_discount(label) -> str:
     discounts = []
-    p = label.select_one("p.early-bird span")
+    p = _css(_SEL_EARLY_BIRD_DISCOUNT).select_one(label)
     if p:
         discounts.append(p.get_text(strip=True))
-    p = label.select_one("p.student span")
+    p = _css(_SEL_STUDENT_DISCOUNT).select_one(label)
     if p:
         discounts.append(p.get_text(strip=True))
     return f"({', '.join(discounts)})" if discounts else ""
@@ -678,8 +801,8 @@ def _confirm_ticket_flow(session: requests.Session, soup: BeautifulSoup, args) -
         timeout=60,
     )
     r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
-    err = _parse_error(soup)
+    soup = _parse(r)
+    err = _response_error(r, soup)
     if err:
         print(f"✗ Error: {err}")
         return None
@@ -749,8 +872,8 @@ def _process_membership(soup: BeautifulSoup, membership_id: str, to_use_membersh
         ask = _get_input("Use THSR membership? (y/n, default: n):", "n", ["y", "n", "yes", "no"])
         to_use_membership = str(ask).lower() == "y"
 
-    sel = "#memberSystemRadio1" if to_use_membership else "#memberSystemRadio3"
-    elem = soup.select_one(sel)
+    sel = _SEL_MEMBER_RADIO if to_use_membership else _SEL_NON_MEMBER_RADIO
+    elem = _css(sel).select_one(soup)
     membership_radio = elem.get("value")
 
     add = {}
@@ -765,7 +888,7 @@ def _process_membership(soup: BeautifulSoup, membership_id: str, to_use_membersh
 
 
 def _process_early_bird(soup: BeautifulSoup, personal_id: str) -> Dict[str, str]:
-    items = [e.get_text(strip=True) for e in soup.select(".superEarlyBird")]
+    items = [e.get_text(strip=True) for e in _css(_SEL_EARLY).select(soup)]
     if not items:
         return {}
 
@@ -779,9 +902,7 @@ def _process_early_bird(soup: BeautifulSoup, personal_id: str) -> Dict[str, str]
                 return pid
             print("ID should not be empty!")
 
-    early_type = soup.select_one(
-        "input[name='TicketPassengerInfoInputPanel:passengerDataView:0:passengerDataView2:passengerDataTypeName']"
-    ).get("value")
+    early_type = _css(_SEL_EARLY_TYPE).select_one(soup).get("value")
 
     form: Dict[str, str] = {
         "TicketPassengerInfoInputPanel:passengerDataView:0:passengerDataView2:passengerDataLastName": "",
@@ -805,129 +926,216 @@ def _process_early_bird(soup: BeautifulSoup, personal_id: str) -> Dict[str, str]
     return form
 
 
-def _show_result(soup: BeautifulSoup) -> None:
-    """Display booking result in a modern, formatted way."""
+def _show_result(soup: BeautifulSoup) -> str:
+    """Display booking result in a modern, formatted way and return the PNR code."""
     _print_header("Booking Successful!")
     
     # PNR Code
     pnr = soup.select_one("p.pnr-code span").get_text(strip=True)
     
+    # Collect output lines and print them in one go
+    lines = []
+    
     # Use bright colors for PNR code
-    if os.environ.get('TERM') and '256' in os.environ.get('TERM', ''):
+    if _SUPPORTS_256:
         # ANSI color codes for highlighting
         bright_green = '\033[38;5;46m'  # Bright green
         bright_yellow = '\033[38;5;226m'  # Bright yellow
         bold = '\033[1m'
         reset = '\033[0m'
         
-        print(f"\n{bold}{bright_yellow}PNR Code: {bright_green}{pnr}{reset}")
-        print("   Use this code for payment and ticket pickup")
+        lines.append(f"\n{bold}{bright_yellow}PNR Code: {bright_green}{pnr}{reset}")
     else:
         # Fallback without colors
-        print(f"\nPNR Code: {pnr}")
-        print("   Use this code for payment and ticket pickup")
+        lines.append(f"\nPNR Code: {pnr}")
+    lines.append("   Use this code for payment and ticket pickup")
     
     # Price and Payment
     price = soup.select_one("#setTrainTotalPriceValue").get_text(strip=True)
     payment_exp = soup.select_one("span.status-unpaid span:nth-child(3)").get_text(strip=True)
-    print(f"\nPrice: {price}")
-    print(f"   Payment due by: {payment_exp}")
+    lines.append(f"\nPrice: {price}")
+    lines.append(f"   Payment due by: {payment_exp}")
     
     # Journey Details
-    print(f"\nJourney Details:")
-    print("   " + "─" * 40)
+    lines.append(f"\nJourney Details:")
+    lines.append("   " + "─" * 40)
     
     date = soup.select_one("span.date span").get_text(strip=True)
-    print(f"   Date: {date}")
+    lines.append(f"   Date: {date}")
     
     depart = soup.select_one("#setTrainDeparture0").get_text(strip=True)
     arrive = soup.select_one("#setTrainArrival0").get_text(strip=True)
-    print(f"   Time: {depart} ~ {arrive}")
+    lines.append(f"   Time: {depart} ~ {arrive}")
     
     depart_name = soup.select_one("p.departure-stn span").get_text(strip=True)
     arrive_name = soup.select_one("p.arrival-stn span").get_text(strip=True)
-    print(f"   From: {depart_name}")
-    print(f"   To: {arrive_name}")
+    lines.append(f"   From: {depart_name}")
+    lines.append(f"   To: {arrive_name}")
     
     # Ticket Details
     seats = [s.get_text(strip=True) for s in soup.select("div.seat-label span")]
     passenger_count = soup.select_one("div.uk-accordion-content span").get_text(strip=True)
     seat_type = soup.select_one("p.info-data span").get_text(strip=True)
-    print(f"   Class: {seat_type}")
-    print(f"   Passengers: {passenger_count}")
-    print(f"   Seats: {', '.join(seats)}")
+    lines.append(f"   Class: {seat_type}")
+    lines.append(f"   Passengers: {passenger_count}")
+    lines.append(f"   Seats: {', '.join(seats)}")
+    
+    lines.append("\n" + "─" * 50)
+    lines.append("Next Steps:")
+    lines.append("   1. Complete payment using the PNR code")
+    lines.append("   2. Collect your ticket at the station or phone app")
+    lines.append("   3. Enjoy your journey!")
     
-    print("\n" + "─" * 50)
-    print("Next Steps:")
-    print("   1. Complete payment using the PNR code")
-    print("   2. Collect your ticket at the station or phone app")
-    print("   3. Enjoy your journey!")
+    print("\n".join(lines))
+    return pnr
+
 
+# Suppress TensorFlow logging; this only takes effect before TF is first imported
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
 
-# Global OCR model instance for reuse
+# Handle both development and PyInstaller bundled environments
+if getattr(sys, 'frozen', False):
+    _OCR_DIR = Path(sys._MEIPASS) / "thsr_ocr"
+else:
+    _OCR_DIR = Path(__file__).parent.parent / "thsr_ocr"
+_OCR_MODEL_PATH = str(_OCR_DIR / "thsr_prediction_model_250827.keras")
+# int8 ONNX export of the same model (see thsr_ocr/onnx_model.py), preferred when present
+_OCR_ONNX_MODEL_PATH = str(_OCR_DIR / "thsr_prediction_model_250827.int8.onnx")
+
+# Global OCR model instance for reuse (False once loading has failed).
+# The OCR stack pulls in TensorFlow, so it is imported on first use rather
+# than at module load; the image processor is cached alongside the model.
 _ocr_model_cache = None
+_ocr_process_image = None
+_ocr_model_lock = threading.Lock()
+
+# Successful OCR predictions keyed by captcha image digest (oldest evicted first)
+_OCR_CACHE_SIZE = 256
+_OCR_CACHE: "OrderedDict[bytes, str]" = OrderedDict()
+_ocr_cache_lock = threading.Lock()
+
+
+def _ensure_ocr_path() -> None:
+    """Make the thsr_ocr modules importable."""
+    ocr_dir = str(_OCR_DIR)
+    if ocr_dir not in sys.path:
+        sys.path.append(ocr_dir)
 
 
 def _get_ocr_model():
     """Get cached OCR model instance, initialize if needed."""
-    global _ocr_model_cache
+    global _ocr_model_cache, _ocr_process_image
     
     if _ocr_model_cache is not None:
-        return _ocr_model_cache
+        return _ocr_model_cache or None
     
-    try:
-        # Suppress TensorFlow logging for cleaner output
-        import logging
-        os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'  # Suppress TF messages
-        logging.getLogger('tensorflow').setLevel(logging.ERROR)
-        
-        # Handle both development and PyInstaller bundled environments
-        if getattr(sys, 'frozen', False):
-            # Running in PyInstaller bundle
-            bundle_dir = Path(sys._MEIPASS)
-            sys.path.append(str(bundle_dir / "thsr_ocr"))
-            model_path = str(bundle_dir / "thsr_ocr" / "thsr_prediction_model_250827.keras")
-        else:
-            # Running in development
-            sys.path.append(str(Path(__file__).parent.parent / "thsr_ocr"))
-            model_path = str(Path(__file__).parent.parent / "thsr_ocr" / "thsr_prediction_model_250827.keras")
+    with _ocr_model_lock:
+        if _ocr_model_cache is not None:
+            return _ocr_model_cache or None
         
-        if not os.path.exists(model_path):
-            print("[ OCR model not found ]")
+        try:
+            _ensure_ocr_path()
+            from datasets.image_processor import process_image
+            
+            # The quantized ONNX model loads quickly and does not need TensorFlow
+            if os.path.exists(_OCR_ONNX_MODEL_PATH) and importlib.util.find_spec("onnxruntime"):
+                from onnx_model import OnnxCaptchaModelTester
+                _ocr_process_image = process_image
+                _ocr_model_cache = OnnxCaptchaModelTester(_OCR_ONNX_MODEL_PATH)
+                return _ocr_model_cache
+            
+            logging.getLogger('tensorflow').setLevel(logging.ERROR)
+            
+            if not os.path.exists(_OCR_MODEL_PATH):
+                print("[ OCR model not found ]")
+                _ocr_model_cache = False
+                return None
+            
+            from test_model import CaptchaModelTester
+            _ocr_process_image = process_image
+            _ocr_model_cache = CaptchaModelTester(_OCR_MODEL_PATH)
+            return _ocr_model_cache
+            
+        except Exception as e:
+            print(f"[ OCR model initialization failed: {e} ]")
+            _ocr_model_cache = False
             return None
-        
-        from test_model import CaptchaModelTester
-        _ocr_model_cache = CaptchaModelTester(model_path)
-        return _ocr_model_cache
-        
-    except Exception as e:
-        print(f"[ OCR model initialization failed: {e} ]")
-        return None
+
+
+class _OcrBatcher:
+    """Groups captcha images from concurrent bookings into batched model calls."""
+    
+    def __init__(self, max_batch_size: int = 8, max_wait: float = 0.05):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+    
+    def submit(self, tester, image_array) -> Future:
+        """Queue an image for prediction; the future resolves to the predicted text."""
+        future: Future = Future()
+        self._queue.put((image_array, future))
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, args=(tester,), daemon=True)
+                    self._worker.start()
+        return future
+    
+    def _run(self, tester) -> None:
+        while True:
+            items = [self._queue.get()]
+            
+            # Wait briefly for more images so they share one model call
+            deadline = time.monotonic() + self.max_wait
+            while len(items) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                predictions = tester.predict_batch([image for image, _ in items])
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+            else:
+                for (_, future), prediction in zip(items, predictions):
+                    future.set_result(prediction)
+
+
+_OCR_BATCHER = _OcrBatcher()
 
 
 def _try_ocr_captcha(img_bytes: bytes, max_attempts: int = 3) -> Optional[str]:
     """Try to recognize captcha using OCR model with retry mechanism."""
+    key = hashlib.blake2b(img_bytes, digest_size=16).digest()
+    with _ocr_cache_lock:
+        cached = _OCR_CACHE.get(key)
+    if cached is not None:
+        print(f"✓ OCR success (cached): [{cached}]")
+        return cached
+    
     try:
         # Get cached model instance
         tester = _get_ocr_model()
         if tester is None:
             return None
         
-        # Import image processor
-        if getattr(sys, 'frozen', False):
-            # Running in PyInstaller bundle
-            bundle_dir = Path(sys._MEIPASS)
-            sys.path.append(str(bundle_dir / "thsr_ocr"))
-        else:
-            # Running in development
-            sys.path.append(str(Path(__file__).parent.parent / "thsr_ocr"))
+        process_image = _ocr_process_image
+        import numpy as np
+        from PIL import Image
         
-        from datasets.image_processor import process_image
+        # Decode the captcha image straight from memory
+        captcha_img = Image.open(io.BytesIO(img_bytes))
+        captcha_img.load()
         
-        # Create temporary file for the captcha image
-        with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as temp_file:
-            temp_file.write(img_bytes)
-            temp_image_path = temp_file.name
+        # Processing is deterministic, so retries reuse the processed image
+        image_array = None
         
         try:
             for attempt in range(max_attempts):
@@ -938,39 +1146,32 @@ def _try_ocr_captcha(img_bytes: bytes, max_attempts: int = 3) -> Optional[str]:
                     else:
                         print(f"[ Retry attempt {attempt + 1}/{max_attempts} ]")
                     
-                    # Process image using the same processor as training  
-                    # Suppress image processing output for cleaner CLI
-                    import warnings
-                    with warnings.catch_warnings():
-                        warnings.simplefilter("ignore")
-                        processed_img = process_image(
-                            temp_image_path,
-                            target_size=(160, 50),  # Model input size
-                            mode='balanced',  # Use balanced processing mode
-                            preview=False
-                        )
+                    if image_array is None:
+                        # Process image using the same processor as training  
+                        # Suppress image processing output for cleaner CLI
+                        with warnings.catch_warnings():
+                            warnings.simplefilter("ignore")
+                            processed_img = process_image(
+                                captcha_img,
+                                target_size=(160, 50),  # Model input size
+                                mode='balanced',  # Use balanced processing mode
+                                preview=False
+                            )
+                        image_array = np.asarray(processed_img)
                     
-                    # Save processed image for prediction
-                    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as processed_file:
-                        processed_img.save(processed_file.name, 'JPEG', quality=95)
-                        processed_path = processed_file.name
+                    # Predict directly from the processed image in memory
+                    prediction = _OCR_BATCHER.submit(tester, image_array).result(timeout=30)
                     
-                    try:
-                        # Predict using OCR model
-                        prediction = tester.predict_image(processed_path)
-                        
-                        if prediction and len(prediction.strip()) >= 3:  # Basic validation
-                            print(f"✓ OCR success: [{prediction}]")
-                            return prediction.strip()
-                        else:
-                            print(f"✗ OCR failed, result too short: [{prediction}]")
-                    
-                    finally:
-                        # Clean up processed image
-                        try:
-                            os.unlink(processed_path)
-                        except:
-                            pass
+                    if prediction and len(prediction.strip()) >= 3:  # Basic validation
+                        print(f"✓ OCR success: [{prediction}]")
+                        prediction = prediction.strip()
+                        with _ocr_cache_lock:
+                            _OCR_CACHE[key] = prediction
+                            if len(_OCR_CACHE) > _OCR_CACHE_SIZE:
+                                _OCR_CACHE.popitem(last=False)
+                        return prediction
+                    else:
+                        print(f"✗ OCR failed, result too short: [{prediction}]")
                             
                 except Exception as e:
                     print(f"✗ OCR attempt {attempt + 1} failed: {e}")
@@ -980,11 +1181,7 @@ def _try_ocr_captcha(img_bytes: bytes, max_attempts: int = 3) -> Optional[str]:
             return None
             
         finally:
-            # Clean up temporary image
-            try:
-                os.unlink(temp_image_path)
-            except:
-                pass
+            captcha_img.close()
                 
     except ImportError as e:
         print(f"   OCR dependencies unavailable, fallback to manual input")
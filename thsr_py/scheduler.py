@@ -1,20 +1,201 @@
 from __future__ import annotations
 
+import ctypes
+import heapq
+import struct
+import sys
 import time
+import traceback
 import uuid
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta, timezone
+from argparse import Namespace
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, timedelta, timezone
 from enum import Enum
 from typing import Dict, List, Optional, Any
 import logging
 import threading
 import json
+import sqlite3
 from pathlib import Path
 import fcntl
 import os
 
+try:
+    import orjson
+except ImportError:  # Optional speedup, fall back to the stdlib encoder
+    orjson = None
+
+# The storage document is assembled from per-task fragments so that only
+# changed tasks need re-encoding on save
+if orjson is not None:
+    def _encode_task(task_data: Dict[str, Any]) -> bytes:
+        # Indented to sit inside the "tasks" array of the stored document
+        return b'    ' + orjson.dumps(task_data, option=orjson.OPT_INDENT_2).replace(b'\n', b'\n    ')
+    
+    def _encode_store(entries: List[bytes], last_updated: str) -> bytes:
+        tasks = b'[\n' + b',\n'.join(entries) + b'\n  ]' if entries else b'[]'
+        return b'{\n  "tasks": ' + tasks + b',\n  "last_updated": ' + orjson.dumps(last_updated) + b'\n}'
+    
+    _json_loads = orjson.loads
+else:
+    # Without indent the stdlib uses its C encoder instead of the pure-Python one
+    _json_encoder = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+    
+    def _encode_task(task_data: Dict[str, Any]) -> bytes:
+        return _json_encoder.encode(task_data).encode()
+    
+    def _encode_store(entries: List[bytes], last_updated: str) -> bytes:
+        return b'{"tasks":[' + b','.join(entries) + b'],"last_updated":' + _json_encoder.encode(last_updated).encode() + b'}'
+    
+    _json_loads = json.loads
+
+# fdatasync skips the metadata flush; macOS only provides fsync
+_fdatasync = getattr(os, 'fdatasync', os.fsync)
+
+# inotify flags (see inotify(7)): in-place writes, new files and renames into the directory
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def _open_inotify(directory: Path) -> Optional[int]:
+    """Watch a directory for file changes; returns None where inotify is unavailable."""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _read_inotify_names(fd: int) -> set:
+    """Drain pending inotify events and return the names of the files they concern."""
+    names = set()
+    while True:
+        try:
+            buf = os.read(fd, 65536)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset < len(buf):
+            _, _, _, name_len = _INOTIFY_EVENT.unpack_from(buf, offset)
+            offset += _INOTIFY_EVENT.size
+            names.add(buf[offset:offset + name_len].rstrip(b"\0").decode(errors="replace"))
+            offset += name_len
+
 from .flows import run as run_booking_flow
-from .schema import STATION_MAP, TIME_TABLE, TicketType, is_ticket_sales_open, get_taiwan_now
+from .schema import (
+    STATION_COUNT, TIME_TABLE_COUNT, TicketType,
+    is_ticket_sales_open, get_taiwan_now, _parse_ymd_slash
+)
+
+# Minimum number of seconds between two non-forced writes of the storage file
+_MIN_SAVE_INTERVAL = 5.0
+
+# Longest the scheduler sleeps between cycles when no task is due sooner
+_MAX_IDLE_WAIT = 300.0
+
+# Number of booking tasks that may run at the same time
+_MAX_PARALLEL_BOOKINGS = 4
+
+
+_output_local = threading.local()
+_quiet_lock = threading.Lock()
+_quiet_depth = 0
+_saved_streams: Dict[str, Any] = {}
+
+
+class _NullOutput:
+    """Writable sink that discards everything."""
+    
+    def write(self, text):
+        return len(text)
+    
+    def flush(self):
+        pass
+
+
+_DISCARD = _NullOutput()
+
+
+class _ThreadOutputRouter:
+    """Stand-in for sys.stdout/sys.stderr that drops output from quiet threads."""
+    
+    def __init__(self, fallback):
+        self._fallback = fallback
+    
+    def _target(self):
+        return _DISCARD if getattr(_output_local, 'quiet', False) else self._fallback
+    
+    def write(self, text):
+        return self._target().write(text)
+    
+    def flush(self):
+        return self._target().flush()
+    
+    def __getattr__(self, attr):
+        return getattr(self._fallback, attr)
+
+
+@contextmanager
+def _quiet_booking_run():
+    """Run a booking flow non-interactively with this thread's console output dropped.
+    
+    Unlike redirect_stdout, this only affects the calling thread, so several
+    booking attempts can run at the same time. A running scheduler already
+    sets THSR_NON_INTERACTIVE for its lifetime, in which case the environment
+    is left alone.
+    """
+    global _quiet_depth
+    
+    with _quiet_lock:
+        if _quiet_depth == 0:
+            _saved_streams['stdout'] = sys.stdout
+            _saved_streams['stderr'] = sys.stderr
+            _saved_streams['env'] = os.environ.get('THSR_NON_INTERACTIVE')
+            sys.stdout = _ThreadOutputRouter(sys.stdout)
+            sys.stderr = _ThreadOutputRouter(sys.stderr)
+            if _saved_streams['env'] != '1':
+                os.environ['THSR_NON_INTERACTIVE'] = '1'
+        _quiet_depth += 1
+    
+    _output_local.quiet = True
+    try:
+        yield
+    finally:
+        _output_local.quiet = False
+        with _quiet_lock:
+            _quiet_depth -= 1
+            if _quiet_depth == 0:
+                sys.stdout = _saved_streams.pop('stdout')
+                sys.stderr = _saved_streams.pop('stderr')
+                original_non_interactive = _saved_streams.pop('env')
+                if original_non_interactive is None:
+                    os.environ.pop('THSR_NON_INTERACTIVE', None)
+                elif original_non_interactive != '1':
+                    os.environ['THSR_NON_INTERACTIVE'] = original_non_interactive
+
+
+def _parse_booking_date(value: str) -> Optional[date]:
+    """Parse a YYYY/MM/DD booking date, returning None if it is invalid."""
+    try:
+        if len(value) == 10 and value[4] == value[7] == '/':
+            # Fast path for the canonical zero-padded form
+            return date(int(value[0:4]), int(value[5:7]), int(value[8:10]))
+        return _parse_ymd_slash(value)
+    except (AttributeError, TypeError, ValueError):
+        return None
 
 
 class BookingStatus(Enum):
@@ -28,7 +209,7 @@ class BookingStatus(Enum):
     WAITING = "waiting"
 
 
-@dataclass
+@dataclass(slots=True)
 class BookingTask:
     id: str
     from_station: int
@@ -60,17 +241,36 @@ class BookingTask:
     success_pnr: Optional[str] = None
     error_message: Optional[str] = None
     
-    def is_expired(self) -> bool:
-        """Check if the booking date has passed."""
-        try:
-            booking_date = datetime.strptime(self.date, "%Y/%m/%d")
-            return datetime.now(timezone.utc).date() > booking_date.date()
-        except ValueError:
+    # Parsed form of ``date`` and the epoch time at which the task expires
+    # (the following UTC midnight), filled in once at construction
+    _booking_date: Optional[date] = field(default=None, init=False, repr=False, compare=False)
+    _expiry_ts: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    # time.monotonic() of the last attempt made by this process (not persisted)
+    _last_attempt_mono: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        self._booking_date = _parse_booking_date(self.date)
+        if self._booking_date is not None:
+            self._expiry_ts = datetime.combine(
+                self._booking_date + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc
+            ).timestamp()
+        # Timestamps are always UTC-aware, so comparisons never need to check
+        if self.created_at.tzinfo is None:
+            self.created_at = self.created_at.replace(tzinfo=timezone.utc)
+        if self.last_attempt is not None and self.last_attempt.tzinfo is None:
+            self.last_attempt = self.last_attempt.replace(tzinfo=timezone.utc)
+    
+    def is_expired(self, today: Optional[date] = None) -> bool:
+        """Check if the booking date has passed (relative to ``today``, UTC by default)."""
+        if self._booking_date is None:
             return False
+        if today is None:
+            return time.time() >= self._expiry_ts
+        return today > self._booking_date
     
-    def should_stop(self) -> bool:
+    def should_stop(self, today: Optional[date] = None) -> bool:
         """Check if task should stop (expired or max attempts reached)."""
-        if self.is_expired():
+        if self.is_expired(today):
             return True
         if self.max_attempts and self.attempts >= self.max_attempts:
             return True
@@ -78,7 +278,6 @@ class BookingTask:
     
     def to_args_namespace(self):
         """Convert to argparse.Namespace for compatibility with existing booking flow."""
-        from argparse import Namespace
         return Namespace(
             from_=self.from_station,
             to=self.to_station,
@@ -98,90 +297,79 @@ class BookingTask:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
-        return {
-            "id": self.id,
-            "from_station": self.from_station,
-            "to_station": self.to_station,
-            "date": self.date,
-            "user_id": self.user_id,
-            "adult_cnt": self.adult_cnt,
-            "student_cnt": self.student_cnt,
-            "child_cnt": self.child_cnt,
-            "senior_cnt": self.senior_cnt,
-            "disabled_cnt": self.disabled_cnt,
-            "time": self.time,
-            "train_index": self.train_index,
-            "seat_prefer": self.seat_prefer,
-            "class_type": self.class_type,
-            "personal_id": self.personal_id,
-            "use_membership": self.use_membership,
-            "no_ocr": self.no_ocr,
-            "interval_minutes": self.interval_minutes,
-            "max_attempts": self.max_attempts,
-            "status": self.status.value,
-            "created_at": self.created_at.isoformat().replace('+00:00', 'Z'),
-            "last_attempt": self.last_attempt.isoformat().replace('+00:00', 'Z') if self.last_attempt else None,
-            "attempts": self.attempts,
-            "success_pnr": self.success_pnr,
-            "error_message": self.error_message
-        }
+        return {name: encode(getattr(self, name)) for name, encode in _TASK_ENCODERS}
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "BookingTask":
         """Create from dictionary (JSON deserialization)."""
-        task = cls(
-            id=data["id"],
-            from_station=data["from_station"],
-            to_station=data["to_station"],
-            date=data["date"],
-            user_id=data.get("user_id"),
-            adult_cnt=data.get("adult_cnt"),
-            student_cnt=data.get("student_cnt"),
-            child_cnt=data.get("child_cnt"),
-            senior_cnt=data.get("senior_cnt"),
-            disabled_cnt=data.get("disabled_cnt"),
-            time=data.get("time"),
-            train_index=data.get("train_index"),
-            seat_prefer=data.get("seat_prefer"),
-            class_type=data.get("class_type"),
-            personal_id=data.get("personal_id"),
-            use_membership=data.get("use_membership"),
-            no_ocr=data.get("no_ocr", False),
-            interval_minutes=data.get("interval_minutes", 5),
-            max_attempts=data.get("max_attempts"),
-            status=BookingStatus(data.get("status", "pending")),
-            attempts=data.get("attempts", 0),
-            success_pnr=data.get("success_pnr"),
-            error_message=data.get("error_message")
-        )
-        
-        if data.get("created_at"):
-            created_at_str = data["created_at"]
-            # Handle both Z format and raw format (assume UTC if no timezone)
-            if created_at_str.endswith('Z'):
-                created_at_str = created_at_str.replace('Z', '+00:00')
-            elif '+' not in created_at_str and 'Z' not in created_at_str:
-                # No timezone info, assume it's already UTC
-                created_at_str += '+00:00'
-            task.created_at = datetime.fromisoformat(created_at_str)
-        if data.get("last_attempt"):
-            last_attempt_str = data["last_attempt"]
-            # Handle both Z format and raw format (assume UTC if no timezone)
-            if last_attempt_str.endswith('Z'):
-                last_attempt_str = last_attempt_str.replace('Z', '+00:00')
-            elif '+' not in last_attempt_str and 'Z' not in last_attempt_str:
-                # No timezone info, assume it's already UTC
-                last_attempt_str += '+00:00'
-            task.last_attempt = datetime.fromisoformat(last_attempt_str)
-            
-        return task
+        kwargs = {}
+        for name, decode in _TASK_DECODERS:
+            if name not in data:
+                continue
+            value = data[name]
+            if decode is not None:
+                # Missing timestamps/status fall back to the field defaults
+                if not value:
+                    continue
+                value = decode(value)
+            kwargs[name] = value
+        return cls(**kwargs)
+
+
+def _identity(value):
+    return value
+
+
+def _format_timestamp(value: Optional[datetime]) -> Optional[str]:
+    """Serialize a UTC datetime with a 'Z' suffix."""
+    return value.isoformat().replace('+00:00', 'Z') if value else None
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """Parse a stored timestamp; values without timezone info are UTC."""
+    if value[-1] == 'Z':
+        # Our own format: naive ISO text in UTC
+        return datetime.fromisoformat(value[:-1]).replace(tzinfo=timezone.utc)
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+# Statuses the scheduler loop still has to look at; the rest are final
+_ACTIVE_STATUSES = (BookingStatus.PENDING, BookingStatus.RUNNING, BookingStatus.WAITING, BookingStatus.FAILED)
+# Statuses the watchdog turns into EXPIRED once the booking date has passed
+_EXPIRABLE_STATUSES = (BookingStatus.PENDING, BookingStatus.RUNNING, BookingStatus.WAITING)
+
+# Per-field converters, built once from the dataclass definition
+_TASK_FIELD_NAMES = tuple(f.name for f in fields(BookingTask) if f.init)
+_TASK_ENCODERS = tuple(
+    (name, {
+        "status": lambda status: status.value,
+        "created_at": _format_timestamp,
+        "last_attempt": _format_timestamp,
+    }.get(name, _identity))
+    for name in _TASK_FIELD_NAMES
+)
+_TASK_DECODERS = tuple(
+    (name, {
+        "status": BookingStatus,
+        "created_at": _parse_timestamp,
+        "last_attempt": _parse_timestamp,
+    }.get(name))
+    for name in _TASK_FIELD_NAMES
+)
 
 
 class BookingScheduler:
     """Main scheduler class that manages multiple booking tasks."""
     
-    def __init__(self, storage_path: str = None, enable_persistence: bool = True):
+    def __init__(self, storage_path: str = None, enable_persistence: bool = True,
+                 storage_backend: Optional[str] = None):
         self.enable_persistence = enable_persistence
+        # "json" (default) rewrites one file per save; "sqlite" only updates
+        # the rows of tasks that changed
+        self.storage_backend = storage_backend or os.environ.get('THSR_STORAGE_BACKEND', 'json')
         
         if storage_path is None and enable_persistence:
             # Auto-detect storage location
@@ -196,14 +384,67 @@ class BookingScheduler:
                 storage_path = str(home_dir / "scheduler.json")
         
         self.storage_path = Path(storage_path) if storage_path else None
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_version: Optional[int] = None
+        if self.storage_path and self.storage_backend == 'sqlite':
+            self.storage_path = self.storage_path.with_suffix('.db')
         self.tasks: Dict[str, BookingTask] = {}
+        # Task IDs by status, so the loop only visits tasks it may still act on.
+        # Change statuses through _set_status to keep it in sync.
+        self._by_status: Dict[BookingStatus, set] = defaultdict(set)
+        # Min-heap of (time.monotonic() seconds, task ID) telling the loop when
+        # to look at a task next. _next_check holds each task's current entry; older heap
+        # entries are stale and skipped when popped.
+        self._due_heap: List[tuple] = []
+        self._next_check: Dict[str, float] = {}
+        # Min-heap of (booking date, task ID) for active tasks, so expired
+        # tasks can be found without scanning
+        self._expiry_heap: List[tuple] = []
         self.running = False
         self.scheduler_thread: Optional[threading.Thread] = None
+        # THSR_NON_INTERACTIVE as it was before start_scheduler set it
+        self._saved_non_interactive: Optional[str] = None
         self.logger = self._setup_logger()
         
+        # Set to wake the scheduler loop early (new task, cancellation, stop)
+        self._wake = threading.Event()
+        
+        # Worker pool for booking attempts (created by start_scheduler) and
+        # the lock guarding bookkeeping shared with the workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.RLock()
+        # Held for a whole save; never taken while holding _lock
+        self._save_lock = threading.Lock()
+        # IDs of tasks handed to a worker whose attempt has not ended yet
+        self._in_flight: set = set()
+        
+        # Incremented on every task mutation; used by the API to derive ETags
+        self.revision = 0
+        
+        # Set when in-memory tasks differ from the storage file
+        self._dirty = False
+        self._last_save = 0.0
+        
+        # Encoded JSON fragment of every task, refreshed only for tasks that
+        # changed. A None entry in _stale_ids means every task needs re-encoding.
+        self._serialized: Dict[str, bytes] = {}
+        self._stale_ids: set = set()
+        # IDs of tasks whose encoding differs from what storage holds
+        self._unsaved_ids: set = set()
+        
         # Initialize file modification time tracking
         self._last_file_mtime: Optional[float] = None
         
+        # Where available, inotify tells us when another process rewrites the
+        # storage file, so reload checks need no stat() call
+        self._inotify_fd: Optional[int] = None
+        self._storage_stale = True
+        if self.storage_path and self.storage_path.parent.exists() and self.storage_backend != 'sqlite':
+            self._inotify_fd = _open_inotify(self.storage_path.parent)
+        
+        if self.enable_persistence and self.storage_path and self.storage_backend == 'sqlite':
+            self._db = self._open_db()
+        
         # Load existing tasks if persistence is enabled
         if self.enable_persistence:
             self._load_tasks()
@@ -227,6 +468,19 @@ class BookingScheduler:
         """Check if tasks should be reloaded based on file modification time."""
         if not self.enable_persistence or not self.storage_path or not self.storage_path.exists():
             return False
+        
+        if self._db is not None:
+            # data_version only changes when another connection commits
+            with self._lock:
+                version = self._db.execute("PRAGMA data_version").fetchone()[0]
+            stale, self._db_version = version != self._db_version, version
+            return stale
+        
+        if self._inotify_fd is not None:
+            if self.storage_path.name in _read_inotify_names(self._inotify_fd):
+                self._storage_stale = True
+            stale, self._storage_stale = self._storage_stale, False
+            return stale
             
         try:
             current_mtime = self.storage_path.stat().st_mtime
@@ -243,49 +497,50 @@ class BookingScheduler:
         if not self.enable_persistence or not self.storage_path:
             return
         
-        # If not forcing and we already have tasks, don't reload unless file changed
-        if not force and self.tasks and not self._should_reload_tasks():
+        # If not forcing, only reload when the file changed on disk, and never
+        # over in-memory changes that have not been written yet
+        if not force and (self._dirty or not self._should_reload_tasks()):
+            return
+        
+        if self._db is not None:
+            self._load_tasks_db()
             return
             
         if self.storage_path.exists():
-            # Use file locking to prevent concurrent access during read
-            lock_path = self.storage_path.with_suffix('.lock')
-            
-            # Try to acquire lock with timeout (shorter timeout for reads)
-            lock_acquired = False
-            lock_fd = None
-            for attempt in range(5):  # Try for up to 0.5 seconds
-                try:
-                    lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_RDWR)
-                    lock_acquired = True
-                    break
-                except FileExistsError:
-                    time.sleep(0.1)  # Wait 100ms before retry
-            
             try:
-                # If we can't get lock, proceed without it (read operations are safer)
-                if not lock_acquired:
-                    self.logger.debug("Could not acquire read lock, proceeding anyway")
-                
-                # Check if file is empty
-                if self.storage_path.stat().st_size == 0:
-                    self.logger.debug("Storage file is empty, starting with no tasks")
-                    return
-                
-                # Clear existing tasks before loading
-                self.tasks.clear()
-                
-                with open(self.storage_path, 'r') as f:
-                    content = f.read().strip()
-                    if not content:
+                # Shared lock: readers only wait for a writer, not for each other
+                with self._storage_lock(fcntl.LOCK_SH):
+                    # Writers are locked out, so what we read now covers every queued event
+                    if self._inotify_fd is not None:
+                        _read_inotify_names(self._inotify_fd)
+                        self._storage_stale = False
+                    
+                    # Check if file is empty
+                    if self.storage_path.stat().st_size == 0:
                         self.logger.debug("Storage file is empty, starting with no tasks")
                         return
                     
-                    data = json.loads(content)
-                    for task_data in data.get("tasks", []):
-                        task = BookingTask.from_dict(task_data)
-                        self.tasks[task.id] = task
-                    
+                    with self._lock:
+                        content = self.storage_path.read_bytes()
+                        if not content or content.isspace():
+                            self.logger.debug("Storage file is empty, starting with no tasks")
+                            loaded = {}
+                        else:
+                            data = _json_loads(content)
+                            loaded = {task.id: task for task in map(BookingTask.from_dict, data.get("tasks", ()))}
+                        
+                        kept = self._adopt_loaded_tasks(loaded)
+                        self._serialized.clear()
+                        self._rebuild_status_index()
+                        self._rebuild_due_heap()
+                        self._rebuild_expiry_heap()
+                        # Encoded lazily by the next save
+                        self._stale_ids.clear()
+                        self._stale_ids.add(None)
+                        self.revision += 1
+                        if kept:
+                            self._mark_dirty(*kept)
+                        
                 self.logger.info(f"Loaded {len(self.tasks)} tasks from {self.storage_path}")
                 
             except json.JSONDecodeError as e:
@@ -298,97 +553,294 @@ class BookingScheduler:
                 
             except Exception as e:
                 self.logger.error(f"Failed to load tasks from storage: {e}")
-                import traceback
                 self.logger.debug(f"Load error traceback: {traceback.format_exc()}")
             
-            finally:
-                # Always release lock if acquired
-                if lock_acquired and lock_fd is not None:
-                    try:
-                        os.close(lock_fd)
-                        lock_path.unlink()
-                    except:
-                        pass
         else:
             self.logger.debug(f"No storage file found at {self.storage_path}, starting with empty task list")
     
-    def _save_tasks(self) -> None:
-        """Save tasks to storage file with simplified locking."""
-        if not self.enable_persistence or not self.storage_path:
-            return
-            
+    def _adopt_loaded_tasks(self, loaded: Dict[str, BookingTask]) -> List[str]:
+        """Replace ``self.tasks`` with tasks read from storage, except those being booked.
+        
+        A worker records its outcome on the task object it was handed, so that
+        object stays in ``self.tasks`` until the attempt ends. Returns the IDs
+        of the tasks kept this way; their state on disk may be outdated.
+        """
+        with self._lock:
+            kept = []
+            for task_id in self._in_flight:
+                task = self.tasks.get(task_id)
+                if task is not None:
+                    loaded[task_id] = task
+                    kept.append(task_id)
+            self.tasks = loaded
+            return kept
+    
+    def _open_db(self) -> sqlite3.Connection:
+        """Open the SQLite task store, creating its schema if needed."""
+        self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared by the loop, the workers and API threads; every use holds self._lock
+        db = sqlite3.connect(self.storage_path, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "id TEXT PRIMARY KEY, status TEXT, user_id TEXT, date TEXT, "
+            "last_attempt TEXT, attempts INTEGER, payload BLOB)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS ix_tasks_status ON tasks(status)")
+        return db
+    
+    def _load_tasks_db(self) -> None:
+        """Load tasks from the SQLite store, in insertion order."""
         try:
-            # Ensure parent directory exists
-            self.storage_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            data = {
-                "tasks": [task.to_dict() for task in self.tasks.values()],
-                "last_updated": datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+            with self._lock:
+                rows = self._db.execute("SELECT id, payload FROM tasks ORDER BY rowid").fetchall()
+                kept = self._adopt_loaded_tasks(
+                    {task_id: BookingTask.from_dict(_json_loads(payload)) for task_id, payload in rows}
+                )
+                # The stored payloads are exactly the encoded fragments
+                self._serialized = {task_id: bytes(payload) for task_id, payload in rows}
+                self._stale_ids.clear()
+                self._rebuild_status_index()
+                self._rebuild_due_heap()
+                self._rebuild_expiry_heap()
+                self._db_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+                self.revision += 1
+                if kept:
+                    self._mark_dirty(*kept)
+            self.logger.info(f"Loaded {len(self.tasks)} tasks from {self.storage_path}")
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to load tasks from storage: {e}")
+            self.logger.debug(f"Load error traceback: {traceback.format_exc()}")
+    
+    def _write_db_rows(self, task_ids: set) -> None:
+        """Upsert the given tasks and delete the rows of removed ones, in one transaction."""
+        upserts = []
+        deletes = []
+        for task_id in task_ids:
+            task = self.tasks.get(task_id)
+            if task is None:
+                deletes.append((task_id,))
+            else:
+                upserts.append((
+                    task_id, task.status.value, task.user_id, task.date,
+                    _format_timestamp(task.last_attempt), task.attempts, self._serialized[task_id]
+                ))
+        
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany(
+                "INSERT INTO tasks (id, status, user_id, date, last_attempt, attempts, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                "status=excluded.status, user_id=excluded.user_id, date=excluded.date, "
+                "last_attempt=excluded.last_attempt, attempts=excluded.attempts, payload=excluded.payload",
+                upserts
+            )
+            self._db.executemany("DELETE FROM tasks WHERE id = ?", deletes)
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+    
+    @contextmanager
+    def _storage_lock(self, operation: int):
+        """Hold an flock on the storage lock file; the kernel releases it on close or crash."""
+        # The lock lives in a separate file because saves replace the storage file's inode
+        fd = os.open(self.storage_path.with_suffix('.lock'), os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, operation)
+            yield
+        finally:
+            os.close(fd)
+    
+    def _set_status(self, task: BookingTask, status: BookingStatus) -> None:
+        """Change a task's status and keep the status index up to date."""
+        with self._lock:
+            self._by_status[task.status].discard(task.id)
+            task.status = status
+            self._by_status[status].add(task.id)
+    
+    def _rebuild_status_index(self) -> None:
+        """Recompute the status index after tasks were replaced wholesale."""
+        with self._lock:
+            self._by_status.clear()
+            for task_id, task in self.tasks.items():
+                self._by_status[task.status].add(task_id)
+    
+    def _schedule_check(self, task_id: str, when: float) -> None:
+        """Have the loop look at a task once time.monotonic() reaches ``when``."""
+        with self._lock:
+            self._next_check[task_id] = when
+            heapq.heappush(self._due_heap, (when, task_id))
+    
+    def _rebuild_due_heap(self) -> None:
+        """Queue every active task for an immediate check."""
+        with self._lock:
+            self._next_check = {
+                task_id: 0.0 for status in _ACTIVE_STATUSES for task_id in self._by_status[status]
             }
-            
-            # Write to temporary file first, then move to final location (atomic write)
-            temp_path = self.storage_path.with_suffix('.tmp')
-            
-            # Simplified locking - try once, if fails, log warning but continue
-            lock_path = self.storage_path.with_suffix('.lock')
-            lock_acquired = False
-            
-            try:
-                lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_RDWR)
-                lock_acquired = True
-            except FileExistsError:
-                self.logger.debug("File is locked by another process, skipping save")
-                return
-            
+            self._due_heap = [(when, task_id) for task_id, when in self._next_check.items()]
+            heapq.heapify(self._due_heap)
+    
+    def _rebuild_expiry_heap(self) -> None:
+        """Recompute the expiry heap from the active tasks."""
+        with self._lock:
+            self._expiry_heap = [
+                (task._booking_date, task_id)
+                for status in _ACTIVE_STATUSES for task_id in self._by_status[status]
+                if (task := self.tasks[task_id])._booking_date is not None
+            ]
+            heapq.heapify(self._expiry_heap)
+    
+    def _mark_dirty(self, *task_ids: str) -> None:
+        """Record mutations of the given tasks (all tasks if none are given)."""
+        with self._lock:
+            self.revision += 1
+            self._dirty = True
+            self._stale_ids.update(task_ids or (None,))
+    
+    def _refresh_serialized(self) -> None:
+        """Re-encode the tasks changed since the last save, noting those whose encoding differs."""
+        if None in self._stale_ids:
+            serialized = {task_id: _encode_task(task.to_dict()) for task_id, task in self.tasks.items()}
+            previous = self._serialized
+            self._unsaved_ids.update(
+                task_id for task_id in serialized.keys() | previous.keys()
+                if serialized.get(task_id) != previous.get(task_id)
+            )
+            self._serialized = serialized
+        else:
+            for task_id in self._stale_ids:
+                task = self.tasks.get(task_id)
+                if task is None:
+                    if self._serialized.pop(task_id, None) is not None:
+                        self._unsaved_ids.add(task_id)
+                    continue
+                encoded = _encode_task(task.to_dict())
+                if self._serialized.get(task_id) != encoded:
+                    self._serialized[task_id] = encoded
+                    self._unsaved_ids.add(task_id)
+        self._stale_ids.clear()
+    
+    def _save_tasks(self, force: bool = False) -> None:
+        """Save tasks to storage file with simplified locking.
+        
+        Only writes when there are unsaved changes; unless ``force`` is set,
+        writes are also spaced at least ``_MIN_SAVE_INTERVAL`` seconds apart.
+        """
+        if not self.enable_persistence or not self.storage_path:
+            return
+        
+        if not self._dirty:
+            return
+        if not force and time.monotonic() - self._last_save < _MIN_SAVE_INTERVAL:
+            return
+        
+        # One save at a time: two threads encoding and writing concurrently
+        # could otherwise land the older snapshot on disk last
+        with self._save_lock:
+            changed: set = set()
             try:
-                with open(temp_path, 'w') as f:
-                    json.dump(data, f, indent=2)
-                
-                # Atomic move
-                temp_path.replace(self.storage_path)
+                # Ensure parent directory exists
+                self.storage_path.parent.mkdir(parents=True, exist_ok=True)
                 
-                # Update our tracked modification time
-                if self.storage_path.exists():
-                    self._last_file_mtime = self.storage_path.stat().st_mtime
+                with self._lock:
+                    self._refresh_serialized()
+                    if not self._unsaved_ids:
+                        # Marked dirty, but every task encodes as already written
+                        self._dirty = False
+                        return
+                    # Cleared here so that changes made while writing are not lost
+                    changed, self._unsaved_ids = self._unsaved_ids, set()
+                    self._dirty = False
+                    
+                    if self._db is not None:
+                        self._write_db_rows(changed)
+                        self._last_save = time.monotonic()
+                        self.logger.debug(f"Saved {len(changed)} tasks to {self.storage_path}")
+                        return
                     
-                self.logger.debug(f"Tasks saved successfully to {self.storage_path}")
+                    payload = _encode_store(
+                        list(self._serialized.values()),
+                        datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+                    )
                 
-            finally:
-                # Always release lock
-                if lock_acquired:
+                # Write to temporary file first, then move to final location (atomic write)
+                temp_path = self.storage_path.with_suffix('.tmp')
+                
+                # Exclusive lock: one writer at a time, across processes
+                with self._storage_lock(fcntl.LOCK_EX):
+                    # Flush the data (not metadata) to disk before the rename so a
+                    # crash cannot leave a truncated file in place
+                    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
                     try:
-                        os.close(lock_fd)
-                        lock_path.unlink()
-                    except:
-                        pass
+                        view = memoryview(payload)
+                        while view:
+                            view = view[os.write(fd, view):]
+                        _fdatasync(fd)
+                    finally:
+                        os.close(fd)
                     
-        except Exception as e:
-            self.logger.error(f"Failed to save tasks to storage: {e}")
-            import traceback
-            self.logger.debug(f"Save error traceback: {traceback.format_exc()}")
+                    # Atomic move
+                    os.replace(temp_path, self.storage_path)
+                    
+                    # Update our tracked modification time
+                    if self.storage_path.exists():
+                        self._last_file_mtime = self.storage_path.stat().st_mtime
+                    
+                    # Our own write is not a reason to reload; no other writer can
+                    # have touched the file while we hold the exclusive lock
+                    if self._inotify_fd is not None:
+                        _read_inotify_names(self._inotify_fd)
+                    
+                    self._last_save = time.monotonic()
+                        
+                    self.logger.debug(f"Tasks saved successfully to {self.storage_path}")
+                        
+            except Exception as e:
+                with self._lock:
+                    self._dirty = True
+                    self._unsaved_ids |= changed
+                self.logger.error(f"Failed to save tasks to storage: {e}")
+                self.logger.debug(f"Save error traceback: {traceback.format_exc()}")
+    
     
     def add_task(self, task: BookingTask) -> str:
         """Add a new booking task."""
         if not task.id:
             task.id = str(uuid.uuid4())
         
-        self.tasks[task.id] = task
-        self._save_tasks()
+        with self._lock:
+            previous = self.tasks.get(task.id)
+            if previous is not None:
+                self._by_status[previous.status].discard(task.id)
+            self.tasks[task.id] = task
+            self._by_status[task.status].add(task.id)
+            self._schedule_check(task.id, 0.0)
+            if task._booking_date is not None:
+                heapq.heappush(self._expiry_heap, (task._booking_date, task.id))
+            self._mark_dirty(task.id)
+        self._save_tasks(force=True)
+        self._wake.set()
         self.logger.info(f"Added new booking task: {task.id}")
         return task.id
     
     def get_task(self, task_id: str) -> Optional[BookingTask]:
         """Get a specific task by ID."""
-        # Only reload if we don't have the task in memory
-        if task_id not in self.tasks:
-            self._load_tasks()
+        # Reloads only if another process changed the storage file and we
+        # hold no unsaved changes (an inotify read or stat otherwise)
+        self._load_tasks()
         return self.tasks.get(task_id)
     
     def list_tasks(self, force_reload: bool = False, include_deleted: bool = False) -> List[BookingTask]:
-        """List all tasks, optionally excluding deleted tasks."""
-        # Only reload if we have no tasks in memory, to avoid overwriting
-        if not self.tasks or force_reload:
-            self._load_tasks()
+        """List all tasks, optionally excluding deleted tasks.
+        
+        The storage check runs on every call, so ``force_reload`` is only kept
+        for existing callers.
+        """
+        # Reloads only if another process changed the storage file and we
+        # hold no unsaved changes (an inotify read or stat otherwise)
+        self._load_tasks()
         
         tasks = list(self.tasks.values())
         
@@ -398,9 +850,62 @@ class BookingScheduler:
         
         return tasks
     
+    def get_status_counts(self) -> Dict[BookingStatus, int]:
+        """Number of tasks per status (statuses without tasks are omitted)."""
+        with self._lock:
+            return {status: len(ids) for status, ids in self._by_status.items() if ids}
+    
+    def pop_expired(self, today: Optional[date] = None) -> List[BookingTask]:
+        """Remove and return the pending, running or waiting tasks whose date has passed.
+        
+        Each task is returned at most once; the caller decides how to mark it.
+        """
+        today = today or datetime.now(timezone.utc).date()
+        expired = []
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] < today:
+                _, task_id = heapq.heappop(heap)
+                task = self.tasks.get(task_id)
+                if task is not None and task.status in _EXPIRABLE_STATUSES:
+                    expired.append(task)
+        return expired
+    
+    def expire_tasks(self, today: Optional[date] = None) -> List[BookingTask]:
+        """Mark the tasks whose date has passed as expired, persist that and return them."""
+        expired = self.pop_expired(today)
+        if not expired:
+            return expired
+        
+        for task in expired:
+            self._set_status(task, BookingStatus.EXPIRED)
+        self._mark_dirty(*(task.id for task in expired))
+        
+        if self.running:
+            # The scheduler loop writes dirty tasks together with its own changes
+            self._wake.set()
+        else:
+            # Forced: the tasks have left the expiry heap, so a save held back
+            # by the debounce would never be retried
+            self._save_tasks(force=True)
+        return expired
+    
+    def list_tasks_for_user(self, user_id: Optional[str], include_deleted: bool = False) -> List[BookingTask]:
+        """List a user's tasks in creation order (oldest first).
+        
+        Tasks are appended to ``self.tasks`` when added and persisted in the same
+        order, so dict order already matches ``created_at`` and callers can page
+        newest-first with ``reversed()`` instead of sorting.
+        """
+        return [
+            task for task in self.list_tasks(include_deleted=include_deleted)
+            if task.user_id == user_id
+        ]
+    
     def cancel_task(self, task_id: str, user_id: Optional[str] = None) -> bool:
         """Cancel a specific task."""
-        # Reload to get latest state
+        # Pick up what another process wrote first, or the forced save below
+        # would overwrite it with our stale copy (no-op unless the file changed)
         self._load_tasks()
         if task_id in self.tasks:
             task = self.tasks[task_id]
@@ -410,15 +915,18 @@ class BookingScheduler:
                 self.logger.warning(f"User {user_id} attempted to cancel task {task_id} owned by {task.user_id}")
                 return False
             
-            task.status = BookingStatus.CANCELLED
-            self._save_tasks()
+            self._set_status(task, BookingStatus.CANCELLED)
+            self._mark_dirty(task_id)
+            self._save_tasks(force=True)
+            self._wake.set()
             self.logger.info(f"Cancelled task: {task_id}")
             return True
         return False
     
     def remove_task(self, task_id: str, user_id: Optional[str] = None) -> bool:
         """Mark a task as deleted instead of removing it completely."""
-        # Reload to get latest state
+        # Pick up what another process wrote first, or the forced save below
+        # would overwrite it with our stale copy (no-op unless the file changed)
         self._load_tasks()
         if task_id in self.tasks:
             task = self.tasks[task_id]
@@ -429,8 +937,10 @@ class BookingScheduler:
                 return False
             
             # Mark as deleted instead of removing
-            task.status = BookingStatus.DELETED
-            self._save_tasks()
+            self._set_status(task, BookingStatus.DELETED)
+            self._mark_dirty(task_id)
+            self._save_tasks(force=True)
+            self._wake.set()
             self.logger.info(f"Marked task as deleted: {task_id}")
             return True
         return False
@@ -442,6 +952,11 @@ class BookingScheduler:
             return
         
         self.running = True
+        self.revision += 1
+        # Booking attempts never prompt; set once here rather than on every attempt
+        self._saved_non_interactive = os.environ.get('THSR_NON_INTERACTIVE')
+        os.environ['THSR_NON_INTERACTIVE'] = '1'
+        self._pool = ThreadPoolExecutor(max_workers=_MAX_PARALLEL_BOOKINGS, thread_name_prefix="thsr-worker")
         self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
         self.scheduler_thread.start()
         self.logger.info("Scheduler started")
@@ -449,75 +964,148 @@ class BookingScheduler:
     def stop_scheduler(self) -> None:
         """Stop the scheduler."""
         self.running = False
+        self.revision += 1
+        self._wake.set()
         if self.scheduler_thread and self.scheduler_thread.is_alive():
             self.scheduler_thread.join(timeout=5)
+        if self._pool:
+            # Wait for attempts still running: their outcome is saved below, and
+            # until they end a flow could prompt on a TTY if the variable were
+            # restored already
+            self._pool.shutdown(wait=True)
+            self._pool = None
+            if self._saved_non_interactive is None:
+                os.environ.pop('THSR_NON_INTERACTIVE', None)
+            else:
+                os.environ['THSR_NON_INTERACTIVE'] = self._saved_non_interactive
+        # Flush changes still held back by the save interval
+        self._save_tasks(force=True)
         self.logger.info("Scheduler stopped")
     
     def _scheduler_loop(self) -> None:
         """Main scheduler loop that runs in background."""
         while self.running:
             try:
-                self._process_tasks()
-                time.sleep(30)  # Check every 30 seconds
+                next_check = self._process_tasks()
+                
+                # Sleep until the earliest task is due, or until woken up
+                self._wake.wait(self._compute_next_wake(next_check))
+                self._wake.clear()
             except Exception as e:
                 self.logger.error(f"Error in scheduler loop: {e}")
-                time.sleep(60)  # Wait longer on error
+                self._wake.wait(60)  # Wait longer on error
+                self._wake.clear()
+    
+    def _compute_next_wake(self, next_check: Optional[float]) -> float:
+        """Seconds to sleep before the next cycle, clamped to [1s, _MAX_IDLE_WAIT]."""
+        timeout = _MAX_IDLE_WAIT
+        if next_check is not None:
+            timeout = min(timeout, next_check - time.monotonic())
+        if self._dirty:
+            timeout = min(timeout, _MIN_SAVE_INTERVAL)  # Retry the held-back save
+        return max(timeout, 1.0)
     
-    def _process_tasks(self) -> None:
-        """Process all pending tasks."""
+    def _process_tasks(self) -> Optional[float]:
+        """Process all due tasks and return the time.monotonic() of the next check."""
         current_time = datetime.now(timezone.utc)
+        now_mono = time.monotonic()
+        today = current_time.date()
+        ready: List[BookingTask] = []
         
-        for task in list(self.tasks.values()):
-            if task.status in [BookingStatus.SUCCESS, BookingStatus.CANCELLED, BookingStatus.DELETED]:
-                continue
-            
-            # Check if task is expired
-            if task.is_expired():
-                task.status = BookingStatus.EXPIRED
-                self.logger.info(f"Task {task.id} expired")
-                continue
-            
-            # Check if task should stop
-            if task.should_stop():
-                task.status = BookingStatus.FAILED
-                task.error_message = "Maximum attempts reached"
-                self.logger.info(f"Task {task.id} stopped after {task.attempts} attempts")
-                continue
-            
-            # Check if ticket sales are open for future booking dates
-            if not is_ticket_sales_open(task.date):
-                if task.status != BookingStatus.WAITING:
-                    task.status = BookingStatus.WAITING
-                    self.logger.info(f"Task {task.id} waiting for ticket sales to open at 00:00 Taiwan time")
-                continue
-            
-            # If task was waiting and ticket sales are now open, change to pending
-            if task.status == BookingStatus.WAITING:
-                task.status = BookingStatus.PENDING
-                self.logger.info(f"Task {task.id} ticket sales now open, resuming booking attempts")
-            
-            # Check if it's time to run this task
-            if task.last_attempt is None:
-                should_run = True
-            else:
-                # Ensure both datetimes are timezone-aware for comparison
-                task_last_attempt = task.last_attempt
-                if task_last_attempt.tzinfo is None:
-                    task_last_attempt = task_last_attempt.replace(tzinfo=timezone.utc)
+        # Only tasks whose check time has come are looked at. A task that
+        # expires is always popped first: pending tasks come up every interval
+        # and waiting tasks at the next Taiwan midnight.
+        # Hold the lock while popping so API threads cannot add tasks mid-iteration;
+        # only the due tasks are collected and run outside it
+        with self._lock:
+            heap = self._due_heap
+            while heap and heap[0][0] <= now_mono:
+                when, task_id = heapq.heappop(heap)
+                if self._next_check.get(task_id) != when:
+                    continue  # Superseded by a later entry
+                del self._next_check[task_id]
+                task = self.tasks.get(task_id)
+                if task is None or task.status not in _ACTIVE_STATUSES or task_id in self._in_flight:
+                    continue
+                
+                # Check if task is expired
+                if task.is_expired(today):
+                    self._set_status(task, BookingStatus.EXPIRED)
+                    self._mark_dirty(task.id)
+                    self.logger.info(f"Task {task.id} expired")
+                    continue
+                
+                # Check if task should stop
+                if task.should_stop(today):
+                    self._set_status(task, BookingStatus.FAILED)
+                    task.error_message = "Maximum attempts reached"
+                    self._mark_dirty(task.id)
+                    self.logger.info(f"Task {task.id} stopped after {task.attempts} attempts")
+                    continue
+                
+                # Check if ticket sales are open for future booking dates
+                if not is_ticket_sales_open(task.date):
+                    if task.status != BookingStatus.WAITING:
+                        self._set_status(task, BookingStatus.WAITING)
+                        self._mark_dirty(task.id)
+                        self.logger.info(f"Task {task.id} waiting for ticket sales to open at 00:00 Taiwan time")
+                    # Sales can only open at the next Taiwan midnight
+                    taiwan_now = get_taiwan_now()
+                    opens_at = (taiwan_now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+                    self._schedule_check(task.id, now_mono + (opens_at - taiwan_now).total_seconds())
+                    continue
+                
+                # If task was waiting and ticket sales are now open, change to pending
+                if task.status == BookingStatus.WAITING:
+                    self._set_status(task, BookingStatus.PENDING)
+                    self._mark_dirty(task.id)
+                    self.logger.info(f"Task {task.id} ticket sales now open, resuming booking attempts")
+                
+                # Check if it's time to run this task
+                if task._last_attempt_mono is not None:
+                    due = task._last_attempt_mono + task.interval_minutes * 60
+                elif task.last_attempt is not None:
+                    # Attempt made before a restart or by another process
+                    due = now_mono + (task.last_attempt - current_time).total_seconds() + task.interval_minutes * 60
+                else:
+                    due = now_mono
                 
-                time_since_last = current_time - task_last_attempt
-                should_run = time_since_last >= timedelta(minutes=task.interval_minutes)
+                if due <= now_mono:
+                    ready.append(task)
+                    self._in_flight.add(task.id)
+                else:
+                    self._schedule_check(task.id, due)
             
-            if should_run:
-                self._execute_booking_task(task)
+        # Booking attempts are independent and mostly network-bound, so run them in parallel
+        if ready:
+            pool = self._pool
+            if pool is None:
+                for task in ready:
+                    self._execute_booking_task(task)
+                    self._finish_booking_attempt(task)
+            else:
+                futures = {pool.submit(self._execute_booking_task, task): task for task in ready}
+                # Persist each attempt as it ends rather than after the slowest one
+                for future in as_completed(futures):
+                    self._finish_booking_attempt(futures[future])
         
         # Periodically clean up old deleted tasks (every hour)
-        self._cleanup_deleted_tasks(current_time)
+        with self._lock:
+            self._cleanup_deleted_tasks(current_time)
         
-        # Only save if there were any changes in this cycle
-        # _execute_booking_task already saves its changes, so we don't need to save again
-        # This prevents unnecessary merge conflicts
-        # self._save_tasks_safe()  # Commented out to prevent SUCCESS status overwrites
+        # Persist everything changed during this cycle in a single write
+        self._save_tasks()
+        
+        with self._lock:
+            return self._due_heap[0][0] if self._due_heap else None
+    
+    def _finish_booking_attempt(self, task: BookingTask) -> None:
+        """Queue a task's next attempt and write its outcome."""
+        with self._lock:
+            if task.status == BookingStatus.PENDING:
+                self._schedule_check(task.id, task._last_attempt_mono + task.interval_minutes * 60)
+            self._in_flight.discard(task.id)
+        self._save_tasks(force=True)
     
     def _cleanup_deleted_tasks(self, current_time: datetime) -> None:
         """Clean up tasks that have been marked as deleted for more than 1 hour."""
@@ -535,16 +1123,18 @@ class BookingScheduler:
         deleted_cutoff = current_time - timedelta(hours=1)
         tasks_to_remove = []
         
-        for task_id, task in self.tasks.items():
-            if (task.status == BookingStatus.DELETED and 
-                task.last_attempt and task.last_attempt < deleted_cutoff):
+        for task_id in self._by_status[BookingStatus.DELETED]:
+            task = self.tasks[task_id]
+            if task.last_attempt and task.last_attempt < deleted_cutoff:
                 tasks_to_remove.append(task_id)
         
         for task_id in tasks_to_remove:
             del self.tasks[task_id]
+            self._by_status[BookingStatus.DELETED].discard(task_id)
             self.logger.debug(f"Permanently removed deleted task: {task_id}")
         
         if tasks_to_remove:
+            self._mark_dirty(*tasks_to_remove)
             self.logger.info(f"Cleaned up {len(tasks_to_remove)} old deleted tasks")
     
     def _save_tasks_safe(self) -> None:
@@ -576,118 +1166,63 @@ class BookingScheduler:
                 else:
                     # Add new task that doesn't exist in file
                     self.tasks[task_id] = task
+            self._rebuild_status_index()
+            self._rebuild_due_heap()
+            self._rebuild_expiry_heap()
+            self._mark_dirty()
         
         self._save_tasks()
     
     def _execute_booking_task(self, task: BookingTask) -> None:
         """Execute a single booking task."""
-        # Store original values for rollback if needed
-        original_status = task.status
-        original_attempts = task.attempts
-        original_last_attempt = task.last_attempt
-        
         # Update task status and attempt info with timezone-aware datetime
-        task.status = BookingStatus.RUNNING
+        self._set_status(task, BookingStatus.RUNNING)
         task.last_attempt = datetime.now(timezone.utc)
+        task._last_attempt_mono = time.monotonic()
         task.attempts += 1
+        self._mark_dirty(task.id)
+        # Written right away so the other process does not see the task as pending
+        self._save_tasks(force=True)
         
         self.logger.info(f"Executing task {task.id} (attempt {task.attempts})")
         
-        # Save immediately after updating attempt count
-        try:
-            self._save_tasks()
-        except Exception as save_error:
-            self.logger.error(f"Failed to save task state before execution: {save_error}")
-
-        # Store environment variable for restoration
-        original_non_interactive = None
-        
         try:
             # Convert task to args namespace
             args = task.to_args_namespace()
             
-            # Capture the booking flow output to detect success
-            import io
-            import sys
-            import os
-            from contextlib import redirect_stdout, redirect_stderr
-            
-            # Set environment variable to indicate non-interactive mode
-            original_non_interactive = os.environ.get('THSR_NON_INTERACTIVE')
-            os.environ['THSR_NON_INTERACTIVE'] = '1'
+            # Run non-interactively; the flow reports its outcome in the returned result
+            with _quiet_booking_run():
+                result = run_booking_flow(args)
             
-            # Create string buffers to capture output
-            stdout_buffer = io.StringIO()
-            stderr_buffer = io.StringIO()
-            
-            # Redirect stdout and stderr to capture output
-            with redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
-                run_booking_flow(args)
-            
-            # Check if booking was successful by looking for PNR in output
-            output = stdout_buffer.getvalue()
-            stderr_output = stderr_buffer.getvalue()
-            
-            self.logger.debug(f"Task {task.id} output length: stdout={len(output)}, stderr={len(stderr_output)}")
-            
-            if "PNR Code:" in output:
-                # Extract PNR code
-                lines = output.split('\n')
-                for line in lines:
-                    if "PNR Code:" in line:
-                        pnr = line.split("PNR Code:")[-1].strip()
-                        # Clean ANSI color codes from PNR
-                        import re
-                        pnr = re.sub(r'\033\[[0-9;]*m', '', pnr).strip()
-                        task.success_pnr = pnr
-                        break
-                
-                task.status = BookingStatus.SUCCESS
+            if result.success:
+                task.success_pnr = result.pnr
+                self._set_status(task, BookingStatus.SUCCESS)
+                self._mark_dirty(task.id)
+                # A booked ticket must reach disk at once; a crash or a reload
+                # before the end of the cycle would otherwise book it again
+                self._save_tasks(force=True)
                 self.logger.info(f"Task {task.id} completed successfully! PNR: {task.success_pnr}")
-                self.logger.info(f"Task {task.id} STATUS SET TO SUCCESS - about to save...")
             else:
-                # Check for error messages in output
-                if stderr_output:
-                    task.error_message = stderr_output.strip()[:500]  # Limit error message length
-                elif "Error" in output or "error" in output.lower():
-                    # Look for error patterns in stdout
-                    error_lines = [line for line in output.split('\n') if 'error' in line.lower() or 'Error' in line]
-                    if error_lines:
-                        task.error_message = '; '.join(error_lines[:3])[:500]
-                    else:
-                        task.error_message = "Booking failed - no PNR code found"
-                else:
-                    task.error_message = "Booking failed - no PNR code found"
-                
-                # Only set to PENDING if task is not already SUCCESS (shouldn't happen but safety check)
-                if task.status != BookingStatus.SUCCESS:
-                    task.status = BookingStatus.PENDING  # Will retry on next cycle
+                task.error_message = (result.error or "Booking failed - no PNR code found")[:500]
+                # Unless cancelled or removed meanwhile, retry on a later cycle
+                if task.status == BookingStatus.RUNNING:
+                    self._set_status(task, BookingStatus.PENDING)
                 self.logger.warning(f"Task {task.id} attempt {task.attempts} failed: {task.error_message}")
             
         except Exception as e:
             # Only override status if it's not already SUCCESS
             if task.status != BookingStatus.SUCCESS:
                 task.error_message = f"Booking execution error: {str(e)}"[:500]
-                task.status = BookingStatus.PENDING  # Will retry on next cycle
+                # Unless cancelled or removed meanwhile, retry on a later cycle
+                if task.status == BookingStatus.RUNNING:
+                    self._set_status(task, BookingStatus.PENDING)
             self.logger.error(f"Task {task.id} failed with exception: {e}")
-            import traceback
             self.logger.debug(f"Task {task.id} traceback: {traceback.format_exc()}")
         
         finally:
-            # Restore original environment variable
-            if original_non_interactive is None:
-                os.environ.pop('THSR_NON_INTERACTIVE', None)
-            else:
-                os.environ['THSR_NON_INTERACTIVE'] = original_non_interactive
-                
-            # Always save the final state
-            try:
-                self.logger.info(f"Task {task.id} FINAL SAVE - status={task.status.value}, pnr={task.success_pnr}")
-                # Save the task state
-                self._save_tasks()
-                self.logger.info(f"Task {task.id} SAVE COMPLETED - status={task.status.value}, attempts={task.attempts}")
-            except Exception as save_error:
-                self.logger.error(f"Failed to save task state after execution: {save_error}")
+            # Other outcomes are written by _process_tasks as the attempt ends
+            self._mark_dirty(task.id)
+            self.logger.info(f"Task {task.id} finished - status={task.status.value}, attempts={task.attempts}")
 
 
 # Global scheduler instance
@@ -698,25 +1233,18 @@ def get_scheduler() -> BookingScheduler:
     """Get or create the global scheduler instance."""
     global _scheduler_instance
     if _scheduler_instance is None:
-        # Check if we're running in the API service
-        # API service should only read, not write to avoid conflicts
-        import os
-        is_api_service = os.environ.get('THSR_API_MODE') == '1'
-        
-        if is_api_service:
-            # API service uses read-write mode with shared storage
-            _scheduler_instance = BookingScheduler(enable_persistence=True)
-            # Load tasks from shared storage
-            _scheduler_instance._load_tasks(force=True)
-        else:
-            # Normal scheduler service with full read/write
-            _scheduler_instance = BookingScheduler()
-        
-        # Tasks are already loaded in __init__ or above
+        # The API service and the standalone scheduler share the same storage;
+        # tasks are loaded once in __init__
+        _scheduler_instance = BookingScheduler(enable_persistence=True)
     # Don't reload automatically - let individual methods decide
     return _scheduler_instance
 
 
+# Accepted values for the optional booking preferences
+_VALID_SEAT_PREFER = frozenset({0, 1, 2})
+_VALID_CLASS_TYPE = frozenset({0, 1})
+
+
 def create_booking_task(
     from_station: int,
     to_station: int,
@@ -748,53 +1276,50 @@ def create_booking_task(
         raise ValueError("Membership preference must be specified (True/False)")
     
     # Validate stations
-    if not 1 <= from_station <= len(STATION_MAP):
-        raise ValueError(f"Invalid from_station: {from_station} (must be 1-{len(STATION_MAP)})")
-    if not 1 <= to_station <= len(STATION_MAP):
-        raise ValueError(f"Invalid to_station: {to_station} (must be 1-{len(STATION_MAP)})")
+    if not 1 <= from_station <= STATION_COUNT:
+        raise ValueError(f"Invalid from_station: {from_station} (must be 1-{STATION_COUNT})")
+    if not 1 <= to_station <= STATION_COUNT:
+        raise ValueError(f"Invalid to_station: {to_station} (must be 1-{STATION_COUNT})")
     
     if from_station == to_station:
         raise ValueError("Departure and arrival stations cannot be the same")
     
     # Validate date format and future date
-    try:
-        booking_date = datetime.strptime(date, "%Y/%m/%d")
-        if booking_date.date() < datetime.now(timezone.utc).date():
-            raise ValueError(f"Booking date must be in the future: {date}")
-    except ValueError as e:
-        if "does not match format" in str(e):
-            raise ValueError(f"Invalid date format (use YYYY/MM/DD): {date}")
-        raise e
+    booking_date = _parse_booking_date(date)
+    if booking_date is None:
+        raise ValueError(f"Invalid date format (use YYYY/MM/DD): {date}")
+    if booking_date < datetime.now(timezone.utc).date():
+        raise ValueError(f"Booking date must be in the future: {date}")
     
     # Validate ticket counts - require at least one ticket
-    total_tickets = (adult_cnt or 0) + (student_cnt or 0) + (child_cnt or 0) + (senior_cnt or 0) + (disabled_cnt or 0)
+    ticket_counts = (
+        ("Adult", adult_cnt or 0),
+        ("Student", student_cnt or 0),
+        ("Child", child_cnt or 0),
+        ("Senior", senior_cnt or 0),
+        ("Disabled", disabled_cnt or 0),
+    )
+    total_tickets = sum(count for _, count in ticket_counts)
     if total_tickets == 0:
         raise ValueError("At least one ticket must be specified")
     if total_tickets > 10:
         raise ValueError("Total ticket count cannot exceed 10")
     
-    if adult_cnt is not None and not 0 <= adult_cnt <= 10:
-        raise ValueError(f"Adult ticket count must be 0-10: {adult_cnt}")
-    if student_cnt is not None and not 0 <= student_cnt <= 10:
-        raise ValueError(f"Student ticket count must be 0-10: {student_cnt}")
-    if child_cnt is not None and not 0 <= child_cnt <= 10:
-        raise ValueError(f"Child ticket count must be 0-10: {child_cnt}")
-    if senior_cnt is not None and not 0 <= senior_cnt <= 10:
-        raise ValueError(f"Senior ticket count must be 0-10: {senior_cnt}")
-    if disabled_cnt is not None and not 0 <= disabled_cnt <= 10:
-        raise ValueError(f"Disabled ticket count must be 0-10: {disabled_cnt}")
+    for label, count in ticket_counts:
+        if not 0 <= count <= 10:
+            raise ValueError(f"{label} ticket count must be 0-10: {count}")
     
     # Validate optional parameters
-    if time is not None and not 1 <= time <= len(TIME_TABLE):
-        raise ValueError(f"Invalid time slot: {time} (must be 1-{len(TIME_TABLE)})")
+    if time is not None and not 1 <= time <= TIME_TABLE_COUNT:
+        raise ValueError(f"Invalid time slot: {time} (must be 1-{TIME_TABLE_COUNT})")
     
     if train_index is not None and train_index < 1:
         raise ValueError(f"Invalid train index: {train_index} (must be >= 1)")
     
-    if seat_prefer is not None and seat_prefer not in [0, 1, 2]:
+    if seat_prefer is not None and seat_prefer not in _VALID_SEAT_PREFER:
         raise ValueError(f"Invalid seat preference: {seat_prefer} (must be 0, 1, or 2)")
     
-    if class_type is not None and class_type not in [0, 1]:
+    if class_type is not None and class_type not in _VALID_CLASS_TYPE:
         raise ValueError(f"Invalid class type: {class_type} (must be 0 or 1)")
     
     # Validate interval
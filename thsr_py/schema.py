@@ -1,8 +1,9 @@
 from __future__ import annotations
-from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Optional
+from datetime import date, datetime, timezone, timedelta
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 
-STATION_MAP = [
+STATION_MAP = (
     "Nangang",
     "Taipei",
     "Banqiao",
@@ -15,9 +16,9 @@ STATION_MAP = [
     "Chiayi",
     "Tainan",
     "Zuouing",
-]
+)
 
-TIME_TABLE = [
+TIME_TABLE = (
     "1201A",
     "1230A",
     "600A",
@@ -56,7 +57,10 @@ TIME_TABLE = [
     "1030P",
     "1100P",
     "1130P",
-]
+)
+
+STATION_COUNT = len(STATION_MAP)
+TIME_TABLE_COUNT = len(TIME_TABLE)
 
 class TicketType:
     Adult = "F"
@@ -75,16 +79,30 @@ def get_taiwan_now() -> datetime:
     return datetime.now(TAIWAN_TZ)
 
 
+def _parse_ymd_slash(value: str) -> date:
+    """Parse a YYYY/MM/DD date (leading zeros optional) without strptime."""
+    parts = value.split('/')
+    if len(parts) != 3 or not all(part.isdigit() for part in parts):
+        raise ValueError(f"Invalid date format (use YYYY/MM/DD): {value}")
+    year, month, day = map(int, parts)
+    return date(year, month, day)
+
+
 def is_ticket_sales_open(booking_date: str) -> bool:
     """
     Check if ticket sales are open for the given booking date.
     Taiwan High Speed Rail ticket sales open 28 days in advance at 00:00 Taiwan time.
     We allow some flexibility for early sales due to holidays or special promotions.
     """
+    return _sales_open_for(booking_date, get_taiwan_now().toordinal())
+
+
+@lru_cache(maxsize=256)
+def _sales_open_for(booking_date: str, today_ordinal: int) -> bool:
+    """Cached body of is_ticket_sales_open; the answer only changes once a day."""
     try:
         # Parse booking date
-        booking_date_obj = datetime.strptime(booking_date, "%Y/%m/%d").date()
-        taiwan_now = get_taiwan_now()
+        booking_date_obj = _parse_ymd_slash(booking_date)
         
         # Calculate the date when ticket sales should open (28 days before booking date)
         sales_open_date = booking_date_obj - timedelta(days=28)
@@ -94,74 +112,49 @@ def is_ticket_sales_open(booking_date: str) -> bool:
         flexible_open_date = sales_open_date - timedelta(days=4)
         
         # Check if we're past the flexible open date
-        return taiwan_now.date() >= flexible_open_date
+        return date.fromordinal(today_ordinal) >= flexible_open_date
     except ValueError:
         return False
 
 
-def parse_time_string(time_str: str) -> Optional[datetime]:
-    """
-    Parse time string from train data (e.g., "0800", "1430", "07:58") to datetime object.
-    Returns None if parsing fails.
-    """
-    try:
-        # Handle HH:MM format (e.g., "07:58")
-        if ':' in time_str:
-            hour, minute = time_str.split(':')
-            hour = int(hour)
-            minute = int(minute)
-            return datetime.now(TAIWAN_TZ).replace(hour=hour, minute=minute, second=0, microsecond=0)
-        # Handle HHMM format (e.g., "0800")
-        elif len(time_str) == 4:
-            hour = int(time_str[:2])
-            minute = int(time_str[2:])
-            return datetime.now(TAIWAN_TZ).replace(hour=hour, minute=minute, second=0, microsecond=0)
-    except (ValueError, IndexError):
-        pass
-    return None
-
-
 def find_closest_train_within_range(trains: List[Dict[str, str]], target_time_idx: int, tolerance_hours: float = 0.5) -> Optional[Dict[str, str]]:
     """
     Find the closest train within ±tolerance_hours of the target time.
     Returns the train closest to the target time, or None if no trains are within range.
     """
-    if not trains or target_time_idx < 1 or target_time_idx > len(TIME_TABLE):
+    if not trains or target_time_idx < 1 or target_time_idx > TIME_TABLE_COUNT:
         return None
     
-    target_time_str = TIME_TABLE[target_time_idx - 1]
-    target_time = _parse_time_table_to_datetime(target_time_str)
-    if not target_time:
+    # Compare as minutes since midnight; all times are on the same day
+    target_minutes = _TIME_TABLE_MINUTES[target_time_idx - 1]
+    if target_minutes is None:
         return None
+    tolerance_minutes = tolerance_hours * 60
     
-    valid_trains = []
+    best_train = None
+    best_diff = tolerance_minutes
     
     for train in trains:
         depart_time_str = train.get('depart', '')
         if not depart_time_str:
             continue
             
-        train_time = parse_time_string(depart_time_str)
-        if not train_time:
+        train_minutes = _parse_depart_minutes(depart_time_str)
+        if train_minutes is None:
             continue
         
-        # Calculate time difference in hours
-        time_diff = abs((train_time - target_time).total_seconds()) / 3600
+        time_diff = abs(train_minutes - target_minutes)
         
-        if time_diff <= tolerance_hours:
-            valid_trains.append((train, time_diff))
+        # Strictly closer only, so the first of equally close trains wins
+        if time_diff < best_diff or (best_train is None and time_diff <= best_diff):
+            best_train, best_diff = train, time_diff
     
-    if not valid_trains:
-        return None
-    
-    # Return the train with the smallest time difference
-    valid_trains.sort(key=lambda x: x[1])
-    return valid_trains[0][0]
+    return best_train
 
 
-def _parse_time_table_to_datetime(time_str: str) -> Optional[datetime]:
+def _parse_time_table_hm(time_str: str) -> Optional[Tuple[int, int]]:
     """
-    Parse time string from TIME_TABLE (e.g., "800A", "200P") to datetime object.
+    Parse time string from TIME_TABLE (e.g., "800A", "200P") to (hour, minute).
     Returns None if parsing fails.
     """
     try:
@@ -183,9 +176,46 @@ def _parse_time_table_to_datetime(time_str: str) -> Optional[datetime]:
             # 1200N is noon
             time_int = 1200
         
-        hour = time_int // 100
-        minute = time_int % 100
-        
-        return datetime.now(TAIWAN_TZ).replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return time_int // 100, time_int % 100
     except (ValueError, IndexError):
         return None
+
+
+# TIME_TABLE is constant, so its entries are parsed once at import
+_TIME_TABLE_HM = [_parse_time_table_hm(time_str) for time_str in TIME_TABLE]
+
+
+_TIME_TABLE_MINUTES = [None if hm is None else hm[0] * 60 + hm[1] for hm in _TIME_TABLE_HM]
+
+
+def _parse_depart_minutes(time_str: str) -> Optional[int]:
+    """
+    Parse a train departure time ("07:58" or "0800") to minutes since midnight.
+    Returns None if parsing fails.
+    """
+    try:
+        if ':' in time_str:
+            hour, minute = time_str.split(':')
+            hour = int(hour)
+            minute = int(minute)
+        elif len(time_str) == 4:
+            hour = int(time_str[:2])
+            minute = int(time_str[2:])
+        else:
+            return None
+    except ValueError:
+        return None
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return None
+    return hour * 60 + minute
+
+
+def format_time_slot(time_str: str) -> str:
+    """Convert a TIME_TABLE entry (e.g. "830P") to 24-hour "HH:MM"."""
+    t_int = int(time_str[:-1])
+    if time_str.endswith("A") and t_int // 100 == 12:
+        t_int %= 1200
+    elif t_int != 1230 and time_str.endswith("P"):
+        t_int += 1200
+    formatted_time = f"{t_int:04d}"
+    return f"{formatted_time[:-2]}:{formatted_time[-2:]}"
@@ -6,11 +6,16 @@ import time
 import logging
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 from .scheduler import get_scheduler, BookingStatus
 
 
+def _status_breakdown(counts: Dict[BookingStatus, int]) -> dict:
+    """Non-zero task counts keyed by status value, in BookingStatus order."""
+    return {status.value: counts[status] for status in BookingStatus if counts.get(status)}
+
+
 class SchedulerWatchdog:
     """
     Watchdog service that monitors and manages the booking scheduler.
@@ -162,51 +167,42 @@ class SchedulerWatchdog:
         """Generate periodic status report."""
         tasks = self.scheduler.list_tasks()
         
-        # Count tasks by status
-        status_counts = {}
-        for status in BookingStatus:
-            count = sum(1 for task in tasks if task.status == status)
-            if count > 0:
-                status_counts[status.value] = count
-        
-        # Find recent activity
+        # The scheduler keeps status counts; count recent activity and
+        # successful bookings in one pass
+        counts = self.scheduler.get_status_counts()
+        counts.pop(BookingStatus.DELETED, None)  # Hidden, as in list_tasks()
+        status_counts = _status_breakdown(counts)
+        recent_count = 0
+        successful_count = 0
         recent_cutoff = datetime.now(timezone.utc) - timedelta(hours=1)
-        recent_tasks = [t for t in tasks if t.last_attempt and t.last_attempt > recent_cutoff]
+        for t in tasks:
+            if t.last_attempt and t.last_attempt > recent_cutoff:
+                recent_count += 1
+            if t.status == BookingStatus.SUCCESS and t.success_pnr:
+                successful_count += 1
         
-        self.logger.info(f"Status Report - Total: {len(tasks)}, Status: {status_counts}, Recent activity: {len(recent_tasks)} tasks")
+        self.logger.info(f"Status Report - Total: {len(tasks)}, Status: {status_counts}, Recent activity: {recent_count} tasks")
         
         # Log successful bookings
-        successful_tasks = [t for t in tasks if t.status == BookingStatus.SUCCESS and t.success_pnr]
-        if successful_tasks:
-            self.logger.info(f"Successful bookings: {len(successful_tasks)} tasks with PNR codes")
+        if successful_count:
+            self.logger.info(f"Successful bookings: {successful_count} tasks with PNR codes")
     
     def _cleanup_expired_tasks(self) -> None:
         """Automatically mark expired tasks."""
-        tasks = self.scheduler.list_tasks()
-        expired_count = 0
-        
-        for task in tasks:
-            if task.status in [BookingStatus.PENDING, BookingStatus.RUNNING, BookingStatus.WAITING] and task.is_expired():
-                task.status = BookingStatus.EXPIRED
-                expired_count += 1
-                self.logger.info(f"Marked task {task.id[:8]}... as expired (date: {task.date})")
-        
-        if expired_count > 0:
-            self.scheduler._save_tasks()  # Save the status changes
+        for task in self.scheduler.expire_tasks():
+            self.logger.info(f"Marked task {task.id[:8]}... as expired (date: {task.date})")
     
     def status(self) -> None:
         """Display current status (non-blocking)."""
-        tasks = self.scheduler.list_tasks()
+        counts = self.scheduler.get_status_counts()
+        counts.pop(BookingStatus.DELETED, None)  # Hidden, as in list_tasks()
+        total = sum(counts.values())
         print(f"Scheduler Status: {'RUNNING' if self.scheduler.running else 'STOPPED'}")
-        print(f"Total Tasks: {len(tasks)}")
+        print(f"Total Tasks: {total}")
         print(f"Storage: {self.scheduler.storage_path}")
         
-        if tasks:
-            status_counts = {}
-            for status in BookingStatus:
-                count = sum(1 for task in tasks if task.status == status)
-                if count > 0:
-                    status_counts[status.value] = count
+        if total:
+            status_counts = _status_breakdown(counts)
             print(f"Status Breakdown: {status_counts}")
         else:
             print("No scheduled tasks found.")
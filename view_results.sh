@@ -21,8 +21,8 @@ usage() {
     echo "Options:"
     echo "  --details             Show detailed task information"
     echo "  --task-id ID          Show specific task details"
-    echo "  --user USER_ID        Filter tasks by user ID"
-    echo "  --status STATUS       Filter tasks by status (pending/running/success/failed/cancelled/expired)"
+    echo "  --user USER_ID        Filter tasks by user ID (comma-separated for several)"
+    echo "  --status STATUS       Filter tasks by status (pending/running/waiting/success/failed/expired/cancelled/deleted, comma-separated)"
     echo "  --container NAME      Docker container name (default: auto-detect)"
     echo "  --help                Show this help message"
     echo ""
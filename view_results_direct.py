@@ -8,37 +8,73 @@ For use inside Docker containers or local server environment.
 import sys
 import json
 import os
-from typing import Optional, List, Dict, Any
+import re
+from typing import Optional, Iterable, List, Dict, Any, Tuple
 from pathlib import Path
-from datetime import datetime
-import argparse
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
+try:
+    import orjson
+    _json_loads = orjson.loads
 
-def load_tasks_from_storage(storage_path: str = "/app/data/thsr_scheduler.json") -> List[Dict[str, Any]]:
-    """Load tasks directly from scheduler storage file."""
+    def _json_dumps(data: Any) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+except ImportError:  # Not installed in every container the viewer is copied into
+    _json_loads = json.loads
+
+    def _json_dumps(data: Any) -> bytes:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def load_tasks_from_storage(storage_path: str = "/app/data/thsr_scheduler.json", task_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Load tasks directly from scheduler storage file, or only the one with ``task_id``."""
+    # Alternative locations, tried in order when the given path is missing
+    candidates = (
+        storage_path,
+        "./data/thsr_scheduler.json",
+        "./thsr_scheduler.json",
+        str(Path.home() / ".thsr" / "scheduler.json"),
+    )
     try:
-        if not Path(storage_path).exists():
-            print(f"× Task storage file not found: {storage_path}")
-            # Try alternative locations
-            alt_paths = [
-                "./data/thsr_scheduler.json",
-                "./thsr_scheduler.json",
-                str(Path.home() / ".thsr" / "scheduler.json")
-            ]
-            
-            for alt_path in alt_paths:
-                if Path(alt_path).exists():
-                    print(f"✓ Found alternative storage: {alt_path}")
-                    storage_path = alt_path
-                    break
-            else:
-                return []
+        # Just try to open each candidate; a separate exists() check is one more stat per path
+        for path in candidates:
+            try:
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                if path == storage_path:
+                    print(f"× Task storage file not found: {storage_path}")
+                continue
+            if path != storage_path:
+                print(f"✓ Found alternative storage: {path}")
+            storage_path = path
+            break
+        else:
+            return []
         
-        with open(storage_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with f:
+            if task_id is not None:
+                try:
+                    import ijson
+                except ImportError:  # Optional; fall back to parsing the whole file
+                    ijson = None
+                if ijson is not None:
+                    # Stream the file so only the requested task is ever built
+                    for task in ijson.items(f, 'tasks.item'):
+                        if task.get('id') == task_id:
+                            print(f"✓ Found task {task_id} in {storage_path}")
+                            return [task]
+                    return []
+            
+            data = _json_loads(f.read())
             
         tasks = data.get('tasks', [])
         print(f"✓ Loaded {len(tasks)} tasks from {storage_path}")
+        if task_id is not None:
+            # Task IDs are unique, so stop at the first match
+            task = next((task for task in tasks if task.get('id') == task_id), None)
+            return [] if task is None else [task]
         return tasks
         
     except json.JSONDecodeError as e:
@@ -49,13 +85,18 @@ def load_tasks_from_storage(storage_path: str = "/app/data/thsr_scheduler.json")
         return []
 
 
-def load_users_from_db() -> Dict[str, Dict[str, Any]]:
-    """Load user information from MySQL database."""
+def load_users_from_db(user_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Load user information from MySQL database, limited to ``user_ids`` if given."""
+    if user_ids is not None:
+        user_ids = tuple(user_ids)
+        if not user_ids:
+            return {}
     try:
         # Try to import database dependencies
         try:
             import pymysql
-            from sqlalchemy import create_engine, text
+            from sqlalchemy import bindparam, create_engine, text
+            from sqlalchemy.pool import NullPool
         except ImportError:
             print("× Warning: Database dependencies not available. User info will be limited.")
             return {}
@@ -71,11 +112,18 @@ def load_users_from_db() -> Dict[str, Dict[str, Any]]:
         
         # Create database connection
         database_url = f"mysql+pymysql://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['database']}"
-        engine = create_engine(database_url)
+        # One query per run, so skip the connection pool and don't hang on an unreachable host
+        engine = create_engine(database_url, poolclass=NullPool, connect_args={'connect_timeout': 3})
         
         # Query users
         with engine.connect() as conn:
-            result = conn.execute(text("SELECT id, username, email, full_name, created_at FROM users"))
+            query = "SELECT id, username, email, full_name, created_at FROM users"
+            if user_ids is None:
+                result = conn.execute(text(query))
+            else:
+                # Only fetch the users the displayed tasks refer to
+                query = text(query + " WHERE id IN :ids").bindparams(bindparam('ids', expanding=True))
+                result = conn.execute(query, {'ids': list(user_ids)})
             users = {}
             for row in result:
                 users[str(row.id)] = {
@@ -85,6 +133,7 @@ def load_users_from_db() -> Dict[str, Dict[str, Any]]:
                     'full_name': row.full_name,
                     'created_at': row.created_at
                 }
+        engine.dispose()
         
         print(f"✓ Loaded {len(users)} users from database")
         return users
@@ -94,96 +143,123 @@ def load_users_from_db() -> Dict[str, Dict[str, Any]]:
         return {}
 
 
+@lru_cache(maxsize=4096)
+def _format_timestamp(value: str) -> str:
+    """Render a stored ISO timestamp as 'YYYY-MM-DD HH:MM:SS'; many tasks share the same values."""
+    try:
+        # fromisoformat only understands the 'Z' suffix from Python 3.11
+        if sys.version_info < (3, 11) and value.endswith('Z'):
+            parsed = datetime.fromisoformat(value[:-1] + '+00:00')
+        else:
+            parsed = datetime.fromisoformat(value)
+    except (AttributeError, TypeError, ValueError):
+        return value
+    return parsed.replace(tzinfo=None).isoformat(sep=' ', timespec='seconds')
+
+
+_STATUS_ICONS = {
+    'success': '✓',
+    'running': '○',
+    'pending': '⏳',
+    'failed': '×',
+    'error': '×',
+    'expired': '⏰',
+    'cancelled': '🚫'
+}
+
+
+# Ticket count fields in display order, with their labels
+_PASSENGER_LABELS = (
+    ('adult_cnt', '成人'),
+    ('student_cnt', '學生'),
+    ('child_cnt', '兒童'),
+    ('senior_cnt', '敬老'),
+    ('disabled_cnt', '愛心'),
+)
+
+# Any SGR color sequence, e.g. the green highlight the booking flow puts around a PNR
+_ANSI_RE = re.compile(r'\x1b\[[0-9;]*m')
+
+
+def _clean_pnr(pnr: Any) -> Any:
+    """Strip the ANSI color codes the booking flow leaves around a PNR."""
+    if isinstance(pnr, str):
+        pnr = _ANSI_RE.sub('', pnr).strip()
+    return pnr
+
+
+@lru_cache(maxsize=64)
+def _status_line(status: str) -> str:
+    """Status line for a lowercased task status; there are only a handful of values."""
+    return f"Status: {_STATUS_ICONS.get(status, '•')} {status.upper()}"
+
+
+@lru_cache(maxsize=256)
+def _passenger_line(counts: Tuple[Any, ...]) -> str:
+    """Passenger summary for ticket counts in _PASSENGER_LABELS order, or '' if there are none."""
+    return ' + '.join(
+        f"{label} {count}" for (_, label), count in zip(_PASSENGER_LABELS, counts) if count > 0
+    )
+
+
 def format_task_details(task: Dict[str, Any], users: Dict[str, Dict[str, Any]] = None) -> None:
     """Format and display detailed task information."""
-    print(f"\n{'='*80}")
-    print(f"Task ID: {task['id']}")
-    print(f"{'='*80}")
+    sys.stdout.write(_format_task_details(task, users))
+
+
+def _format_task_details(task: Dict[str, Any], users: Dict[str, Dict[str, Any]] = None) -> str:
+    """Detailed task information as one block of text, so it can be written in a single call."""
+    lines = ["", '=' * 80]
+    lines.append(f"Task ID: {task['id']}")
+    lines.append(f"{'='*80}")
     
     # User info
     user_id = task.get('user_id')
     if user_id and users and user_id in users:
         user = users[user_id]
-        print(f"User: {user.get('full_name', user.get('username', 'Unknown'))} ({user.get('email', 'No email')})")
+        lines.append(f"User: {user.get('full_name', user.get('username', 'Unknown'))} ({user.get('email', 'No email')})")
     elif user_id:
-        print(f"User ID: {user_id}")
+        lines.append(f"User ID: {user_id}")
     else:
-        print("User: Not specified")
+        lines.append("User: Not specified")
     
     # Basic info
-    status_icons = {
-        'success': '✓',
-        'running': '○',
-        'pending': '⏳',
-        'failed': '×',
-        'error': '×',
-        'expired': '⏰',
-        'cancelled': '🚫'
-    }
     status = task.get('status', 'unknown').lower()
-    status_icon = status_icons.get(status, '•')
-    print(f"Status: {status_icon} {status.upper()}")
+    lines.append(_status_line(status))
     
     # Route info
     from_station = task.get('from_station', 'Unknown')
     to_station = task.get('to_station', 'Unknown')
-    print(f"Route: Station {from_station} -> Station {to_station}")
-    print(f"Date: {task.get('date', 'Not specified')}")
+    lines.append(f"Route: Station {from_station} -> Station {to_station}")
+    lines.append(f"Date: {task.get('date', 'Not specified')}")
     
     # Passenger info
-    passengers = []
-    adult_cnt = task.get('adult_cnt') or 0
-    student_cnt = task.get('student_cnt') or 0
-    child_cnt = task.get('child_cnt') or 0
-    senior_cnt = task.get('senior_cnt') or 0
-    disabled_cnt = task.get('disabled_cnt') or 0
-    
-    if adult_cnt > 0:
-        passengers.append(f"成人 {adult_cnt}")
-    if student_cnt > 0:
-        passengers.append(f"學生 {student_cnt}")
-    if child_cnt > 0:
-        passengers.append(f"兒童 {child_cnt}")
-    if senior_cnt > 0:
-        passengers.append(f"敬老 {senior_cnt}")
-    if disabled_cnt > 0:
-        passengers.append(f"愛心 {disabled_cnt}")
-    
+    passengers = _passenger_line(tuple(task.get(key) or 0 for key, _ in _PASSENGER_LABELS))
     if passengers:
-        print(f"Passengers: {' + '.join(passengers)}")
+        lines.append(f"Passengers: {passengers}")
     
     # Timing info
     if task.get('created_at'):
-        try:
-            created = datetime.fromisoformat(task['created_at'].replace('Z', '+00:00'))
-            print(f"Created: {created.strftime('%Y-%m-%d %H:%M:%S')}")
-        except:
-            print(f"Created: {task['created_at']}")
+        lines.append(f"Created: {_format_timestamp(task['created_at'])}")
     
     # Progress info
     attempts = task.get('attempts', 0)
     max_attempts = task.get('max_attempts')
     max_str = f"/{max_attempts}" if max_attempts else "/∞"
-    print(f"Attempts: {attempts}{max_str}")
-    print(f"Interval: {task.get('interval_minutes', 5)} minutes")
+    lines.append(f"Attempts: {attempts}{max_str}")
+    lines.append(f"Interval: {task.get('interval_minutes', 5)} minutes")
     
     if task.get('last_attempt'):
-        try:
-            last_attempt = datetime.fromisoformat(task['last_attempt'].replace('Z', '+00:00'))
-            print(f"Last Attempt: {last_attempt.strftime('%Y-%m-%d %H:%M:%S')}")
-        except:
-            print(f"Last Attempt: {task['last_attempt']}")
+        lines.append(f"Last Attempt: {_format_timestamp(task['last_attempt'])}")
     
     # Result info
     if status == 'success' and task.get('success_pnr'):
-        print(f"✓ SUCCESS!")
-        pnr = task['success_pnr']
-        # Clean ANSI color codes
-        if isinstance(pnr, str):
-            pnr = pnr.replace('\u001b[38;5;46m', '').replace('\u001b[0m', '').strip()
-        print(f"PNR Code: {pnr}")
+        lines.append("✓ SUCCESS!")
+        lines.append(f"PNR Code: {_clean_pnr(task['success_pnr'])}")
     elif task.get('error_message'):
-        print(f"× Last Error: {task['error_message']}")
+        lines.append(f"× Last Error: {task['error_message']}")
+    
+    return '\n'.join(lines) + '\n'
 
 
 def display_summary(tasks: List[Dict[str, Any]], users: Dict[str, Dict[str, Any]] = None) -> None:
@@ -194,32 +270,23 @@ def display_summary(tasks: List[Dict[str, Any]], users: Dict[str, Dict[str, Any]
     
     # Calculate statistics
     total = len(tasks)
-    status_counts = {}
-    total_attempts = 0
-    successful_pnrs = []
-    user_stats = {}
+    status_counts = Counter(task.get('status', 'unknown') for task in tasks)
+    total_attempts = sum(task.get('attempts', 0) for task in tasks)
+    successful_pnrs = [
+        _clean_pnr(task['success_pnr']) for task in tasks
+        if task.get('status') == 'success' and task.get('success_pnr')
+    ]
     
-    for task in tasks:
-        # Status stats
-        status = task.get('status', 'unknown')
-        status_counts[status] = status_counts.get(status, 0) + 1
-        total_attempts += task.get('attempts', 0)
-        
-        # Success stats
-        if status == 'success' and task.get('success_pnr'):
-            pnr = task['success_pnr']
-            if isinstance(pnr, str):
-                pnr = pnr.replace('\u001b[38;5;46m', '').replace('\u001b[0m', '').strip()
-            successful_pnrs.append(pnr)
-        
-        # User stats
-        user_id = task.get('user_id')
-        if user_id:
-            if user_id not in user_stats:
-                user_stats[user_id] = {'tasks': 0, 'success': 0}
-            user_stats[user_id]['tasks'] += 1
-            if status == 'success':
-                user_stats[user_id]['success'] += 1
+    # User stats are only shown when user info was loaded
+    user_tasks = Counter()
+    user_success = Counter()
+    if users:
+        for task in tasks:
+            user_id = task.get('user_id')
+            if user_id:
+                user_tasks[user_id] += 1
+                if task.get('status') == 'success':
+                    user_success[user_id] += 1
     
     print(f"\n>> Task Summary")
     print(f"{'='*50}")
@@ -230,29 +297,22 @@ def display_summary(tasks: List[Dict[str, Any]], users: Dict[str, Dict[str, Any]
     print(f"Success Rate: {success_count}/{total} ({success_rate:.1f}%)")
     
     print(f"\nStatus Breakdown:")
-    status_icons = {
-        'success': '✓',
-        'running': '○',
-        'pending': '⏳',
-        'failed': '×',
-        'error': '×',
-        'expired': '⏰',
-        'cancelled': '🚫'
-    }
-    
-    for status, count in status_counts.items():
-        percentage = count / total * 100
-        icon = status_icons.get(status.lower(), '•')
+    percent_per_task = 100.0 / total
+    # Most common statuses first
+    for status, count in status_counts.most_common():
+        percentage = count * percent_per_task
+        icon = _STATUS_ICONS.get(status.lower(), '•')
         print(f"  {icon} {status.upper()}: {count} ({percentage:.1f}%)")
     
     # User statistics
-    if user_stats and users:
+    if user_tasks:
         print(f"\nUser Statistics:")
-        for user_id, stats in user_stats.items():
+        for user_id, task_count in user_tasks.items():
             user = users.get(user_id, {})
             username = user.get('full_name', user.get('username', f'User {user_id}'))
-            user_success_rate = stats['success'] / stats['tasks'] * 100 if stats['tasks'] > 0 else 0
-            print(f"  {username}: {stats['success']}/{stats['tasks']} ({user_success_rate:.1f}%)")
+            user_success_count = user_success[user_id]
+            user_success_rate = user_success_count / task_count * 100
+            print(f"  {username}: {user_success_count}/{task_count} ({user_success_rate:.1f}%)")
     
     if successful_pnrs:
         print(f"\n>> Successful Bookings:")
@@ -260,15 +320,93 @@ def display_summary(tasks: List[Dict[str, Any]], users: Dict[str, Dict[str, Any]
             print(f"  ✓ PNR: {pnr}")
 
 
+# BookingStatus values as the scheduler writes them (this script does not import thsr_py)
+_TASK_STATUSES = ('pending', 'running', 'waiting', 'success', 'failed', 'expired', 'cancelled', 'deleted')
+
+# Finished tasks that --compact may drop once they are old enough
+_COMPACTABLE_STATUSES = frozenset({'cancelled', 'expired', 'deleted'})
+
+
+def compact_storage(storage_path: str, max_age_days: int = 30) -> None:
+    """Drop cancelled/expired/deleted tasks older than ``max_age_days`` from the storage file.
+    
+    Run this while the scheduler is stopped: a running scheduler merges its
+    in-memory tasks back into the file on its next save.
+    """
+    import fcntl
+
+    path = Path(storage_path)
+    if not path.exists():
+        print(f"× Task storage file not found: {storage_path}")
+        sys.exit(1)
+    
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+    
+    def is_stale(task: Dict[str, Any]) -> bool:
+        if str(task.get('status', '')).lower() not in _COMPACTABLE_STATUSES:
+            return False
+        value = task.get('last_attempt') or task.get('created_at')
+        try:
+            if sys.version_info < (3, 11) and value.endswith('Z'):
+                value = value[:-1] + '+00:00'
+            stamp = datetime.fromisoformat(value)
+        except (AttributeError, TypeError, ValueError):
+            return False  # Keep anything we cannot date
+        if stamp.tzinfo is None:
+            stamp = stamp.replace(tzinfo=timezone.utc)
+        return stamp < cutoff
+    
+    # Same lock file the scheduler takes around its own writes
+    lock_fd = os.open(path.with_suffix('.lock'), os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        data = _json_loads(path.read_bytes())
+        tasks = data.get('tasks', [])
+        kept = [task for task in tasks if not is_stale(task)]
+        removed = len(tasks) - len(kept)
+        if not removed:
+            print(f"✓ Nothing to compact in {storage_path} ({len(tasks)} tasks)")
+            return
+        
+        data['tasks'] = kept
+        data['last_updated'] = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+        
+        # Write next to the file and rename over it, as the scheduler does
+        temp_path = path.with_suffix('.tmp')
+        with open(temp_path, 'wb') as f:
+            f.write(_json_dumps(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        print(f"✓ Removed {removed} old tasks from {storage_path} ({len(kept)} remaining)")
+    finally:
+        os.close(lock_fd)
+
+
 def main():
     """Main CLI viewer."""
+    import argparse
+
+    def status_list(value: str) -> frozenset:
+        """Parse --status once into a set of known, lowercased statuses."""
+        statuses = frozenset(status.strip().lower() for status in value.split(','))
+        unknown = statuses.difference(_TASK_STATUSES)
+        if unknown:
+            raise argparse.ArgumentTypeError(
+                f"unknown status {', '.join(sorted(unknown))} (choose from {', '.join(_TASK_STATUSES)})"
+            )
+        return statuses
+
     parser = argparse.ArgumentParser(description="THSR-Sniper Direct Results Viewer")
     parser.add_argument("--details", action="store_true", help="Show detailed task information")
     parser.add_argument("--task-id", help="Show specific task details")
     parser.add_argument("--storage-path", help="Path to scheduler storage file")
     parser.add_argument("--no-db", action="store_true", help="Skip database user lookup")
-    parser.add_argument("--user", help="Filter tasks by user ID")
-    parser.add_argument("--status", help="Filter tasks by status")
+    parser.add_argument("--compact", action="store_true",
+                        help="Remove cancelled/expired/deleted tasks older than 30 days from storage (stop the scheduler first)")
+    parser.add_argument("--user", help="Filter tasks by user ID (comma-separated for several)")
+    parser.add_argument("--status", type=status_list,
+                        help=f"Filter tasks by status, comma-separated for several ({'/'.join(_TASK_STATUSES)})")
     
     args = parser.parse_args()
     
@@ -277,48 +415,63 @@ def main():
     
     # Load tasks from storage
     storage_path = args.storage_path or "/app/data/thsr_scheduler.json"
-    tasks = load_tasks_from_storage(storage_path)
+    if args.compact:
+        compact_storage(storage_path)
+        return
+    
+    tasks = all_tasks = load_tasks_from_storage(storage_path, task_id=args.task_id)
     
     if not tasks:
+        if args.task_id:
+            print(f"Task with ID '{args.task_id}' not found.")
+            sys.exit(1)
         print(">> No tasks found in storage.")
         print("   This is normal if no booking tasks have been created yet.")
         print("   Create tasks through the web interface or API first.")
         return  # Exit successfully with exit code 0
     
-    # Load users from database if available
-    users = {} if args.no_db else load_users_from_db()
-    
     # Show initial task count for debugging
     print(f"✓ Found {len(tasks)} total tasks before filtering")
     
-    # Filter tasks
-    if args.task_id:
-        tasks = [task for task in tasks if task.get('id') == args.task_id]
-        if not tasks:
-            print(f"Task with ID '{args.task_id}' not found.")
-            sys.exit(1)
+    # Filter tasks (--task-id was already applied while loading)
+    # Normalize the filter values once; user_id is compared as a string since that is how it is stored
+    user_filter = {user.strip() for user in args.user.split(',')} if args.user else None
+    status_filter = args.status
     
-    if args.user:
+    if user_filter is not None or status_filter is not None:
+        # Apply both filters in one pass, counting what the user filter lets through
         original_count = len(tasks)
-        # Convert user argument to string for comparison since user_id is stored as string
-        user_filter = str(args.user)
-        tasks = [task for task in tasks if str(task.get('user_id', '')) == user_filter]
-        print(f"✓ Filtered by user '{user_filter}': {len(tasks)} tasks (from {original_count} total)")
-        if not tasks:
-            print(f"No tasks found for user '{args.user}'.")
-            print("Available user IDs in tasks:")
-            all_user_ids = set(str(task.get('user_id', 'None')) for task in load_tasks_from_storage(args.storage_path or "/app/data/thsr_scheduler.json"))
-            for uid in sorted(all_user_ids):
-                print(f"  - {uid}")
-            sys.exit(1)
+        user_count = 0
+        filtered = []
+        for task in tasks:
+            if user_filter is not None and str(task.get('user_id', '')) not in user_filter:
+                continue
+            user_count += 1
+            # The scheduler always writes lowercase status values
+            if status_filter is not None and task.get('status', '') not in status_filter:
+                continue
+            filtered.append(task)
+        tasks = filtered
+        
+        if user_filter is not None:
+            print(f"✓ Filtered by user '{args.user}': {user_count} tasks (from {original_count} total)")
+            if not user_count:
+                print(f"No tasks found for user '{args.user}'.")
+                print("Available user IDs in tasks:")
+                all_user_ids = set(str(task.get('user_id', 'None')) for task in all_tasks)
+                for uid in sorted(all_user_ids):
+                    print(f"  - {uid}")
+                sys.exit(1)
+        
+        if status_filter is not None:
+            status_label = ','.join(sorted(status_filter))
+            print(f"✓ Filtered by status '{status_label}': {len(tasks)} tasks (from {user_count} total)")
+            if not tasks:
+                print(f"No tasks found with status '{status_label}'.")
+                sys.exit(1)
     
-    if args.status:
-        original_count = len(tasks)
-        tasks = [task for task in tasks if task.get('status', '').lower() == args.status.lower()]
-        print(f"✓ Filtered by status '{args.status}': {len(tasks)} tasks (from {original_count} total)")
-        if not tasks:
-            print(f"No tasks found with status '{args.status}'.")
-            sys.exit(1)
+    # Load users from database if available
+    users = {} if args.no_db else load_users_from_db({str(task['user_id']) for task in tasks if task.get('user_id')})
     
     # Display results
     if args.task_id:
@@ -330,8 +483,7 @@ def main():
         
         if args.details:
             print(f"\n>> Detailed Task Information:")
-            for task in tasks:
-                format_task_details(task, users)
+            sys.stdout.write(''.join(_format_task_details(task, users) for task in tasks))
 
 
 if __name__ == "__main__":